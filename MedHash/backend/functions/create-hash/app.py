@@ -3,17 +3,21 @@ Create Hash Function
 Generates SHA-256 hash of paper + summary for blockchain verification
 """
 
-import json
+import orjson
 import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
+from decimal import Decimal
 import os
 import hashlib
 import hmac
 from datetime import datetime
 import time
 import logging
-from typing import Dict, Any, Optional
-import secrets
-import traceback
+from typing import Dict, Any, Optional, Union
+import binascii
+from collections import deque
+from dataclasses import dataclass
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -23,44 +27,64 @@ logger = Logger(service="medhash-create-hash")
 tracer = Tracer(service="medhash-create-hash")
 metrics = Metrics(namespace="MedHash", service="create-hash")
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
+# Initialize DynamoDB with keep-alive so warm invocations reuse connections
+boto_config = Config(
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    retries={'max_attempts': 2, 'mode': 'standard'}
+)
+dynamodb = boto3.resource('dynamodb', config=boto_config)
 verifications_table_name = os.environ.get('VERIFICATIONS_TABLE', 'medhash-verifications-dev')
 verifications_table = dynamodb.Table(verifications_table_name)
+# Items returned with a failed condition come back in DynamoDB's wire format
+_deserializer = TypeDeserializer()
+
+def _probe_sha_extensions() -> bool:
+    """Check whether the host CPU exposes SHA-256 instructions (x86 SHA-NI / ARMv8 SHA2)"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return 'sha_ni' in flags or 'sha2' in flags
+
+# Probed once per cold start; hashlib's OpenSSL picks the fast path on its own
+_HAS_SHA_NI = _probe_sha_extensions()
 
 class HashGenerator:
     """Handles cryptographic hash generation"""
     
     @staticmethod
-    def generate_sha256(data: str) -> str:
+    def generate_sha256(data: Union[str, bytes]) -> str:
         """
         Generate SHA-256 hash
         
         Args:
-            data: Input string to hash
+            data: Input string (or pre-encoded UTF-8 bytes) to hash
             
         Returns:
             Hexadecimal hash string
         """
-        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha256(data).digest().hex()
     
     @staticmethod
-    def generate_hmac(data: str, key: str) -> str:
+    def generate_hmac(data: Union[str, bytes], key: str) -> str:
         """
         Generate HMAC-SHA256
         
         Args:
-            data: Input string to hash
+            data: Input string (or pre-encoded UTF-8 bytes) to hash
             key: Secret key for HMAC
             
         Returns:
             Hexadecimal HMAC string
         """
-        return hmac.new(
-            key.encode('utf-8'),
-            data.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        # One-shot OpenSSL HMAC; avoids building a Python HMAC object per call
+        return hmac.digest(key.encode('utf-8'), data, 'sha256').hex()
     
     @staticmethod
     def generate_hash(paper_data: Dict[str, Any], summary_text: str, secret_key: Optional[str] = None) -> str:
@@ -75,23 +99,28 @@ class HashGenerator:
         Returns:
             Generated hash
         """
-        # Create canonical representation
-        components = [
+        # Canonical representation is pmid|title|doi|pubdate|summary
+        components = (
             paper_data.get('pmid', ''),
             paper_data.get('title', ''),
             paper_data.get('doi', ''),
-            paper_data.get('pubdate', ''),
-            summary_text.strip()
-        ]
-        
-        # Join with separator
-        combined = '|'.join(components)
-        
-        # Generate hash
+            paper_data.get('pubdate', '')
+        )
+
         if secret_key:
-            return HashGenerator.generate_hmac(combined, secret_key)
+            h = hmac.new(secret_key.encode('utf-8'), None, hashlib.sha256)
         else:
-            return HashGenerator.generate_sha256(combined)
+            h = hashlib.sha256()
+
+        # Feed each component straight into the digest instead of
+        # materializing the joined string
+        update = h.update
+        for part in components:
+            update(part.encode('utf-8'))
+            update(b'|')
+        update(summary_text.strip().encode('utf-8'))
+
+        return h.digest().hex()
     
     @staticmethod
     def verify_hash(data: str, expected_hash: str, key: Optional[str] = None) -> bool:
@@ -106,41 +135,95 @@ class HashGenerator:
         Returns:
             True if hash matches
         """
+        data_bytes = data.encode('utf-8')
         if key:
-            computed = HashGenerator.generate_hmac(data, key)
+            computed = HashGenerator.generate_hmac(data_bytes, key)
         else:
-            computed = HashGenerator.generate_sha256(data)
+            computed = HashGenerator.generate_sha256(data_bytes)
+        
+        # Pad/truncate to the digest length so compare_digest never takes its
+        # early exit on a length mismatch; the length check is folded in after
+        digest_len = len(computed)
+        length_ok = len(expected_hash) == digest_len
+        expected_norm = expected_hash if length_ok else (expected_hash + '0' * digest_len)[:digest_len]
         
         # Constant-time comparison to prevent timing attacks
-        return hmac.compare_digest(computed, expected_hash)
+        return bool(hmac.compare_digest(computed, expected_norm) & length_ok)
+
+# Pre-generated (from, to) address pairs for simulated transactions
+_ADDR_POOL = deque()
+
+def _refill_addr_pool(n: int = 256) -> None:
+    """Refill the address pool from a single os.urandom read"""
+    hexed = binascii.hexlify(os.urandom(40 * n)).decode()
+    _ADDR_POOL.extend(
+        (hexed[i:i + 40], hexed[i + 40:i + 80]) for i in range(0, 80 * n, 80)
+    )
 
 class BlockchainSimulator:
     """Simulates blockchain interactions (for hackathon)"""
     
     @staticmethod
-    def create_transaction(hash_value: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    def create_transaction(hash_value: str, metadata: Dict[str, Any],
+                           created_at: Optional[str] = None,
+                           epoch: Optional[int] = None) -> Dict[str, Any]:
         """
         Simulate blockchain transaction
         
         Args:
             hash_value: Hash to store
             metadata: Additional metadata
+            created_at: ISO timestamp to record (defaults to now)
+            epoch: Epoch seconds used for the block number (defaults to now)
             
         Returns:
             Simulated blockchain transaction data
         """
+        if epoch is None:
+            epoch = int(time.time())
+        if created_at is None:
+            created_at = datetime.utcnow().isoformat()
+        
+        if not _ADDR_POOL:
+            _refill_addr_pool()
+        from_addr, to_addr = _ADDR_POOL.popleft()
+        
         return {
             'network': 'Ethereum Sepolia Testnet',
             'transactionHash': f"0x{hash_value[:64]}",
-            'blockNumber': int(time.time()) % 1000000,
-            'timestamp': datetime.utcnow().isoformat(),
-            'from': '0x' + secrets.token_hex(20),
-            'to': '0x' + secrets.token_hex(20),
+            'blockNumber': epoch % 1000000,
+            'timestamp': created_at,
+            'from': '0x' + from_addr,
+            'to': '0x' + to_addr,
             'gasUsed': '21000',
             'status': 'success',
             'note': 'SIMULATED FOR HACKATHON - Not a real blockchain transaction'
         }
 
+def decimal_default(obj: Any) -> Any:
+    """orjson default hook for the Decimal values DynamoDB returns"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError
+
+@dataclass
+class HashResponse:
+    """Response body returned for a created hash"""
+    # Declared by hand: dataclass(slots=True) needs Python 3.10
+    __slots__ = ('hash', 'pmid', 'summaryId', 'created_at', 'verification_url', 'api_url', 'blockchain')
+    hash: str
+    pmid: str
+    summaryId: str
+    created_at: str
+    verification_url: str
+    api_url: str
+    blockchain: Optional[Dict[str, Any]]
+    
+    def to_body(self) -> Dict[str, Any]:
+        """Fields to serialize, leaving out blockchain when nothing was recorded"""
+        return {name: getattr(self, name) for name in self.__slots__
+                if getattr(self, name) is not None}
+
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
 @metrics.log_metrics
@@ -155,26 +238,35 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     Returns:
         API Gateway response
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    # Only serialized when DEBUG logging is enabled
+    logger.debug("Received event", extra={'event': event})
     metrics.add_metric(name="InvocationCount", unit=MetricUnit.Count, value=1)
+    metrics.add_metadata(key="sha_ni", value=_HAS_SHA_NI)
+    if not _HAS_SHA_NI:
+        metrics.add_metric(name="SlowSHAPath", unit=MetricUnit.Count, value=1)
+    
+    # Read the clock once and reuse it for every timestamp in this request
+    now_epoch = time.time()
+    now_iso = datetime.utcfromtimestamp(now_epoch).isoformat()
+    now_ts = int(now_epoch)
     
     try:
         # Parse request body
         body = {}
         if event.get('body'):
             try:
-                body = json.loads(event['body'])
-            except json.JSONDecodeError:
+                body = orjson.loads(event['body'])
+            except orjson.JSONDecodeError:
                 return {
                     'statusCode': 400,
                     'headers': {
                         'Content-Type': 'application/json',
                         'Access-Control-Allow-Origin': '*'
                     },
-                    'body': json.dumps({
+                    'body': orjson.dumps({
                         'error': 'Invalid JSON',
                         'message': 'Request body must be valid JSON'
-                    })
+                    }).decode()
                 }
         
         # Extract required fields
@@ -201,11 +293,11 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': 'Missing required fields',
                     'missing_fields': missing_fields,
                     'message': f"Please provide: {', '.join(missing_fields)}"
-                })
+                }).decode()
             }
         
         # Prepare paper data
@@ -221,22 +313,13 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         logger.info(f"Generated hash: {hash_value}")
         metrics.add_metric(name="HashGenerated", unit=MetricUnit.Count, value=1)
         
-        # Check for duplicate hash
-        try:
-            existing = verifications_table.get_item(Key={'hash': hash_value})
-            if 'Item' in existing:
-                logger.warning(f"Hash already exists: {hash_value}")
-                # Still return success, but note it's a duplicate
-        except Exception as e:
-            logger.warning(f"Error checking duplicate: {str(e)}")
-        
         # Simulate blockchain transaction if requested
         blockchain_data = None
         if store_on_chain:
             blockchain_data = BlockchainSimulator.create_transaction(hash_value, {
                 'pmid': pmid,
                 'summaryId': summary_id
-            })
+            }, created_at=now_iso, epoch=now_ts)
             logger.info("Simulated blockchain transaction")
             metrics.add_metric(name="BlockchainSimulated", unit=MetricUnit.Count, value=1)
         
@@ -246,8 +329,8 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
             'pmid': pmid,
             'summaryId': summary_id,
             'paper_title': title,
-            'created_at': datetime.utcnow().isoformat(),
-            'timestamp': int(time.time()),
+            'created_at': now_iso,
+            'timestamp': now_ts,
             'verification_count': 0,
             'last_verified': None,
             'metadata': {
@@ -260,28 +343,40 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         if blockchain_data:
             verification_record['blockchain'] = blockchain_data
         
-        # Store in DynamoDB
+        # Store in DynamoDB; the condition doubles as the duplicate check
+        created_at = now_iso
         try:
-            verifications_table.put_item(Item=verification_record)
+            verifications_table.put_item(
+                Item=verification_record,
+                ConditionExpression='attribute_not_exists(#h)',
+                ExpressionAttributeNames={'#h': 'hash'},
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
             logger.info(f"Stored verification record for hash {hash_value}")
             metrics.add_metric(name="RecordStored", unit=MetricUnit.Count, value=1)
+        except verifications_table.meta.client.exceptions.ConditionalCheckFailedException as e:
+            logger.warning(f"Hash already exists: {hash_value}")
+            metrics.add_metric(name="DuplicateHash", unit=MetricUnit.Count, value=1)
+            # Still return success, describing the original record rather than this attempt
+            stored = {key: _deserializer.deserialize(value)
+                      for key, value in e.response.get('Item', {}).items()}
+            if stored:
+                created_at = stored.get('created_at', created_at)
+                blockchain_data = stored.get('blockchain')
         except Exception as e:
             logger.error(f"Error storing in DynamoDB: {str(e)}")
             # Continue even if storage fails
         
         # Prepare response
-        response = {
-            'hash': hash_value,
-            'pmid': pmid,
-            'summaryId': summary_id,
-            'created_at': verification_record['created_at'],
-            'verification_url': f"/verify/{hash_value}",
-            'api_url': f"https://api.medhash.com/verify/{hash_value}"  # Update with your domain
-        }
-        
-        # Include blockchain data if available
-        if blockchain_data:
-            response['blockchain'] = blockchain_data
+        response = HashResponse(
+            hash=hash_value,
+            pmid=pmid,
+            summaryId=summary_id,
+            created_at=created_at,
+            verification_url=f"/verify/{hash_value}",
+            api_url=f"https://api.medhash.com/verify/{hash_value}",  # Update with your domain
+            blockchain=blockchain_data
+        )
         
         return {
             'statusCode': 200,
@@ -289,12 +384,11 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps(response)
+            'body': orjson.dumps(response.to_body(), default=decimal_default).decode()
         }
         
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())
+    except Exception:
+        logger.exception("Unexpected error")
         metrics.add_metric(name="UnhandledError", unit=MetricUnit.Count, value=1)
         return {
             'statusCode': 500,
@@ -302,8 +396,8 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Internal server error',
                 'message': 'An unexpected error occurred while creating hash'
-            })
+            }).decode()
         }
\ No newline at end of file
@@ -5,6 +5,7 @@ Unit tests for create-hash function
 import pytest
 import json
 from unittest.mock import patch, MagicMock
+import app
 from app import lambda_handler, HashGenerator
 
 class TestCreateHash:
@@ -44,6 +45,14 @@ class TestCreateHash:
         assert HashGenerator.verify_hash(data, hash_value) is True
         assert HashGenerator.verify_hash("wrong|data", hash_value) is False
     
+    def test_hash_verification_length_mismatch(self):
+        data = "test|data|123"
+        hash_value = HashGenerator.generate_sha256(data)
+        
+        assert HashGenerator.verify_hash(data, hash_value[:32]) is False
+        assert HashGenerator.verify_hash(data, hash_value + '0') is False
+        assert HashGenerator.verify_hash(data, '') is False
+    
     def test_hash_verification_hmac(self):
         data = "test|data|123"
         key = "secret123"
@@ -64,6 +73,42 @@ class TestCreateHash:
         assert body['pmid'] == '12345678'
         assert 'verification_url' in body
     
+    @patch('app.verifications_table.put_item')
+    def test_lambda_handler_without_chain_omits_blockchain(self, mock_put):
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'summaryId': 'test123',
+                'summary': 'This is a test summary',
+                'storeOnChain': False
+            })
+        }
+        
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        assert 'blockchain' not in json.loads(response['body'])
+    
+    @patch('app.verifications_table.put_item')
+    def test_lambda_handler_duplicate_returns_stored_record(self, mock_put, valid_event):
+        exceptions = app.verifications_table.meta.client.exceptions
+        mock_put.side_effect = exceptions.ConditionalCheckFailedException({
+            'Error': {'Code': 'ConditionalCheckFailedException'},
+            'Item': {
+                'created_at': {'S': '2024-01-01T00:00:00'},
+                'blockchain': {'M': {
+                    'transactionHash': {'S': '0xstored'},
+                    'blockNumber': {'N': '42'}
+                }}
+            }
+        }, 'PutItem')
+        
+        response = lambda_handler(valid_event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['created_at'] == '2024-01-01T00:00:00'
+        assert body['blockchain'] == {'transactionHash': '0xstored', 'blockNumber': 42}
+        assert mock_put.call_args[1]['ReturnValuesOnConditionCheckFailure'] == 'ALL_OLD'
+    
     def test_lambda_handler_missing_fields(self):
         event = {
             'body': json.dumps({
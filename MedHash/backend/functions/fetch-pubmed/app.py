@@ -4,24 +4,34 @@ Retrieves paper metadata and abstract from PubMed API
 """
 
 import json
-import urllib.request
-import urllib.parse
+import orjson
+import urllib3
 import boto3
+from botocore.config import Config
 import os
+import re
 from datetime import datetime
-import xml.etree.ElementTree as ET
+from io import BytesIO
+from lxml import etree
 import logging
-from typing import Dict, Any, Optional, List
-import traceback
+from typing import Dict, Any, Optional, List, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from medhash_utils import TTLCache
 
 # Configure Powertools
 logger = Logger(service="medhash-fetch-pubmed")
 tracer = Tracer(service="medhash-fetch-pubmed")
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
+# Initialize DynamoDB with keep-alive so warm invocations reuse connections
+boto_config = Config(
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    retries={'max_attempts': 2, 'mode': 'standard'}
+)
+dynamodb = boto3.resource('dynamodb', config=boto_config)
 table_name = os.environ.get('TABLE_NAME', 'medhash-papers-dev')
 table = dynamodb.Table(table_name)
 
@@ -31,19 +41,73 @@ PUBMED_ESEARCH_URL = f"{PUBMED_BASE_URL}esearch.fcgi"
 PUBMED_ESUMMARY_URL = f"{PUBMED_BASE_URL}esummary.fcgi"
 PUBMED_EFETCH_URL = f"{PUBMED_BASE_URL}efetch.fcgi"
 
+# Per-request timeouts. With the retries below, a stalled PubMed fails well
+# inside API Gateway's 29s limit
+PUBMED_TIMEOUT = urllib3.Timeout(connect=2, read=5)
+# 5xx responses get one more try, spaced by rate_limit() like any other call
+PUBMED_ATTEMPTS = 2
+RETRIABLE_STATUSES = frozenset({500, 502, 503, 504})
+
+# Shared connection pool for E-utilities; warm invocations reuse the TLS connection
+http_pool = urllib3.PoolManager(
+    num_pools=2,
+    maxsize=10,
+    headers={
+        'User-Agent': 'MedHash/1.0 (mailto:contact@medhash.com)',
+        # urllib3 transparently decodes gzip bodies into response.data
+        'Accept-Encoding': 'gzip'
+    },
+    timeout=PUBMED_TIMEOUT,
+    # Only failed connections are retried here; they never reached PubMed, so
+    # they do not count against its rate limit. Timed-out reads are not retried
+    retries=urllib3.Retry(total=1, read=0, respect_retry_after_header=False)
+)
+
+# Worker threads for the concurrent esummary/efetch calls, kept across warm invocations
+fetch_executor = ThreadPoolExecutor(max_workers=2)
+
+# Warm-container read-aside cache over the papers table: pmid -> item
+PAPER_CACHE_TTL = 300  # seconds
+PAPER_CACHE_SIZE = 256
+_paper_cache = TTLCache(PAPER_CACHE_TTL, PAPER_CACHE_SIZE)
+
+# PMIDs are 1-20 ASCII digits
+_PMID_MATCH = re.compile(r'[0-9]{1,20}').fullmatch
+
 # Rate limiting for PubMed API (3 requests per second)
 import time
 _last_request_time = 0
+_rate_limit_lock = threading.Lock()
 MIN_REQUEST_INTERVAL = 0.34  # ~3 requests per second
 
 def rate_limit():
-    """Rate limit PubMed API calls"""
+    """Rate limit PubMed API calls (safe to call from worker threads)"""
     global _last_request_time
-    current_time = time.time()
-    time_since_last = current_time - _last_request_time
-    if time_since_last < MIN_REQUEST_INTERVAL:
-        time.sleep(MIN_REQUEST_INTERVAL - time_since_last)
-    _last_request_time = time.time()
+    with _rate_limit_lock:
+        current_time = time.time()
+        time_since_last = current_time - _last_request_time
+        if time_since_last < MIN_REQUEST_INTERVAL:
+            time.sleep(MIN_REQUEST_INTERVAL - time_since_last)
+        _last_request_time = time.time()
+
+class PubMedAPIError(Exception):
+    """Raised when PubMed returns a non-success HTTP status"""
+    
+    def __init__(self, code: int, reason: str):
+        super().__init__(f"{code} - {reason}")
+        self.code = code
+        self.reason = reason
+
+def pubmed_get(url: str) -> bytes:
+    """GET an E-utilities URL over the shared pool and return the raw body"""
+    for _ in range(PUBMED_ATTEMPTS):
+        rate_limit()
+        response = http_pool.request('GET', url)
+        if response.status not in RETRIABLE_STATUSES:
+            break
+    if response.status >= 400:
+        raise PubMedAPIError(response.status, response.reason)
+    return response.data
 
 class PubMedFetcher:
     """Handles fetching data from PubMed API"""
@@ -63,18 +127,9 @@ class PubMedFetcher:
         url = f"{PUBMED_ESUMMARY_URL}?db=pubmed&id={pmid}&retmode=json"
         
         try:
-            rate_limit()
             logger.info(f"Fetching metadata for PMID {pmid}")
             
-            req = urllib.request.Request(
-                url,
-                headers={
-                    'User-Agent': 'MedHash/1.0 (mailto:contact@medhash.com)'
-                }
-            )
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode())
+            data = orjson.loads(pubmed_get(url))
                 
             result = data.get('result', {})
             paper_data = result.get(pmid, {})
@@ -99,7 +154,7 @@ class PubMedFetcher:
                 'pages': paper_data.get('pages', ''),
                 'pmcid': paper_data.get('pmcid', '')
             }
-        except urllib.error.HTTPError as e:
+        except PubMedAPIError as e:
             logger.error(f"HTTP error fetching metadata: {e.code} - {e.reason}")
             raise
         except Exception as e:
@@ -121,32 +176,34 @@ class PubMedFetcher:
         url = f"{PUBMED_EFETCH_URL}?db=pubmed&id={pmid}&retmode=xml&rettype=abstract"
         
         try:
-            rate_limit()
             logger.info(f"Fetching abstract for PMID {pmid}")
             
-            req = urllib.request.Request(
-                url,
-                headers={
-                    'User-Agent': 'MedHash/1.0 (mailto:contact@medhash.com)'
-                }
-            )
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                xml_data = response.read().decode()
-            
-            # Parse XML
-            root = ET.fromstring(xml_data)
+            xml_data = pubmed_get(url)
             
             # Find abstract text - handle multiple formats
             abstract_parts = []
+            other_abstract_parts = []
+            book_title = None
             
-            # Try different paths for abstract
-            for abstract in root.findall('.//AbstractText'):
-                label = abstract.get('Label', '')
-                text = abstract.text or ''
+            # Stream-parse with lxml, visiting only the elements we need and
+            # clearing each AbstractText once consumed
+            for _, elem in etree.iterparse(
+                BytesIO(xml_data),
+                tag=('AbstractText', 'BookTitle'),
+                resolve_entities=False
+            ):
+                parent = elem.getparent()
+                
+                if elem.tag == 'BookTitle':
+                    if book_title is None and parent is not None and parent.tag == 'Book':
+                        book_title = elem.text or ''
+                    continue
+                
+                label = elem.get('Label', '')
+                text = elem.text or ''
                 
                 # Get all text including tail
-                for child in abstract:
+                for child in elem:
                     if child.text:
                         text += child.text
                     if child.tail:
@@ -156,33 +213,54 @@ class PubMedFetcher:
                     abstract_parts.append(f"**{label}:** {text}")
                 else:
                     abstract_parts.append(text)
+                
+                # Also collect OtherAbstract text
+                if parent is not None and parent.tag == 'OtherAbstract':
+                    other_abstract_parts.append(elem.text or '')
+                
+                elem.clear()
             
-            # Also check for OtherAbstract
-            for abstract in root.findall('.//OtherAbstract/AbstractText'):
-                text = abstract.text or ''
-                abstract_parts.append(text)
+            abstract_parts.extend(other_abstract_parts)
             
             if abstract_parts:
                 return '\n\n'.join(abstract_parts)
             
             # If no abstract found, check if it's a book chapter
-            book_title = root.find('.//Book/BookTitle')
             if book_title is not None:
-                return f"This is a book chapter from: {book_title.text}"
+                return f"This is a book chapter from: {book_title}"
             
             return "Abstract not available for this article."
             
-        except ET.ParseError as e:
+        except etree.XMLSyntaxError as e:
             logger.error(f"XML parsing error: {str(e)}")
             return "Error parsing abstract XML."
         except Exception as e:
             logger.error(f"Error fetching abstract: {str(e)}")
             raise
 
+    @staticmethod
+    def fetch_paper(pmid: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Fetch metadata and abstract concurrently
+        
+        The two E-utilities calls are independent, so they are issued from
+        worker threads and overlap on the network (still spaced by rate_limit).
+        
+        Args:
+            pmid: PubMed ID
+            
+        Returns:
+            Tuple of (metadata dict, abstract text)
+        """
+        metadata_future = fetch_executor.submit(PubMedFetcher.fetch_metadata, pmid)
+        abstract_future = fetch_executor.submit(PubMedFetcher.fetch_abstract, pmid)
+        return metadata_future.result(), abstract_future.result()
+
     @staticmethod
     def validate_pmid(pmid: str) -> bool:
         """Validate PubMed ID format"""
-        return bool(pmid and pmid.isdigit() and 1 <= len(pmid) <= 20)
+        # The body is client JSON, so pmid may be any type
+        return isinstance(pmid, str) and _PMID_MATCH(pmid) is not None
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
@@ -197,15 +275,15 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     Returns:
         API Gateway response
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.debug("Received event", extra={'event': event})
     
     try:
         # Parse request body
         body = {}
         if event.get('body'):
             try:
-                body = json.loads(event['body'])
-            except json.JSONDecodeError:
+                body = orjson.loads(event['body'])
+            except orjson.JSONDecodeError:
                 return {
                     'statusCode': 400,
                     'headers': {
@@ -247,11 +325,15 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                 })
             }
         
-        # Check if already in DynamoDB
+        # Check if already in DynamoDB, trying this container's cache first
         try:
-            response = table.get_item(Key={'pmid': pmid})
+            item = _paper_cache.get(pmid)
+            if item is None:
+                item = table.get_item(Key={'pmid': pmid}).get('Item')
+                if item is not None:
+                    _paper_cache.put(pmid, item)
             
-            if 'Item' in response:
+            if item is not None:
                 logger.info(f"Paper {pmid} found in cache")
                 return {
                     'statusCode': 200,
@@ -262,7 +344,7 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                     'body': json.dumps({
                         'pmid': pmid,
                         'cached': True,
-                        'data': response['Item']
+                        'data': item
                     })
                 }
         except Exception as e:
@@ -272,11 +354,8 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         # Fetch from PubMed
         logger.info(f"Fetching paper {pmid} from PubMed")
         
-        # Get metadata
-        metadata = PubMedFetcher.fetch_metadata(pmid)
-        
-        # Get abstract
-        abstract = PubMedFetcher.fetch_abstract(pmid)
+        # Get metadata and abstract in parallel
+        metadata, abstract = PubMedFetcher.fetch_paper(pmid)
         
         # Create article record
         article = {
@@ -299,6 +378,7 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         # Store in DynamoDB
         try:
             table.put_item(Item=article)
+            _paper_cache.put(pmid, article)
             logger.info(f"Stored paper {pmid} in DynamoDB")
         except Exception as e:
             logger.error(f"Error storing in DynamoDB: {str(e)}")
@@ -318,7 +398,7 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
             })
         }
         
-    except urllib.error.HTTPError as e:
+    except PubMedAPIError as e:
         logger.error(f"PubMed API error: {e.code} - {e.reason}")
         return {
             'statusCode': 502,
@@ -333,8 +413,7 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         }
         
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Unexpected error")
         return {
             'statusCode': 500,
             'headers': {
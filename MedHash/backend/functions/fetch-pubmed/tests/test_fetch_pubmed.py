@@ -5,10 +5,17 @@ Unit tests for fetch-pubmed function
 import pytest
 import json
 from unittest.mock import patch, MagicMock
+import app
 from app import lambda_handler, PubMedFetcher
 
 class TestFetchPubMed:
     
+    @pytest.fixture(autouse=True)
+    def clear_paper_cache(self):
+        app._paper_cache.clear()
+        yield
+        app._paper_cache.clear()
+    
     @pytest.fixture
     def valid_event(self):
         return {
@@ -31,6 +38,8 @@ class TestFetchPubMed:
         assert PubMedFetcher.validate_pmid('') is False
         assert PubMedFetcher.validate_pmid('12345abc') is False
         assert PubMedFetcher.validate_pmid('123456789012345678901') is False
+        assert PubMedFetcher.validate_pmid(['12345678']) is False
+        assert PubMedFetcher.validate_pmid(12345678) is False
     
     @patch('app.table.get_item')
     def test_lambda_handler_cached(self, mock_get_item, valid_event):
@@ -48,6 +57,22 @@ class TestFetchPubMed:
         assert body['cached'] is True
         assert body['data']['pmid'] == '12345678'
     
+    @patch('app.table.get_item')
+    def test_lambda_handler_cached_in_container(self, mock_get_item, valid_event):
+        mock_get_item.return_value = {
+            'Item': {
+                'pmid': '12345678',
+                'title': 'Cached Paper'
+            }
+        }
+        
+        lambda_handler(valid_event, None)
+        response = lambda_handler(valid_event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['cached'] is True
+        assert mock_get_item.call_count == 1
+    
     @patch('app.PubMedFetcher.fetch_metadata')
     @patch('app.PubMedFetcher.fetch_abstract')
     @patch('app.table.get_item')
@@ -76,4 +101,12 @@ class TestFetchPubMed:
         response = lambda_handler(invalid_event, None)
         assert response['statusCode'] == 400
         body = json.loads(response['body'])
-        assert 'error' in body
\ No newline at end of file
+        assert 'error' in body
+    
+    def test_lambda_handler_non_string_pmid(self):
+        event = {
+            'body': json.dumps({'pmid': ['12345678']})
+        }
+        
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 400
@@ -1,124 +1,171 @@
-import json
+import orjson
 import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 import os
 from datetime import datetime
 import hashlib
+import random
 import time
 import logging
-from typing import Dict, Any, Optional
-import traceback
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from medhash_utils import TTLCache
 
 # Configure Powertools
 logger = Logger(service="medhash-generate-summary")
 tracer = Tracer(service="medhash-generate-summary")
 metrics = Metrics(namespace="MedHash", service="generate-summary")
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-bedrock = boto3.client('bedrock-runtime')
+# Initialize AWS clients with keep-alive so warm invocations and the
+# parallel summary calls reuse pooled connections
+boto_config = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=5,
+    retries={'max_attempts': 5, 'mode': 'adaptive'}
+)
+# Bedrock gets a single attempt per call: BedrockSummarizer already retries and
+# rotates to the fallback model, and a stalled read must end well inside the
+# summary deadline (SUMMARY_TIMEOUT)
+BEDROCK_READ_TIMEOUT = 10  # seconds
+bedrock_config = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=BEDROCK_READ_TIMEOUT,
+    retries={'max_attempts': 1, 'mode': 'standard'}
+)
+session = boto3.session.Session()
+dynamodb = session.resource('dynamodb', config=boto_config)
+bedrock = session.client('bedrock-runtime', config=bedrock_config)
 
 # Get environment variables
 papers_table_name = os.environ.get('PAPERS_TABLE', 'medhash-papers-dev')
 summaries_table_name = os.environ.get('SUMMARIES_TABLE', 'medhash-summaries-dev')
 bedrock_model_id = os.environ.get('BEDROCK_MODEL_ID', 'apac.amazon.nova-lite-v1:0')  # Updated default
+# Optional second model or inference profile used when the primary is throttled
+bedrock_fallback_model_id = os.environ.get('BEDROCK_FALLBACK_MODEL_ID', '')
 
 papers_table = dynamodb.Table(papers_table_name)
 summaries_table = dynamodb.Table(summaries_table_name)
 
-class BedrockSummarizer:
-    """Handles AI summary generation using Amazon Bedrock"""
-    
-    def __init__(self, model_id: str = bedrock_model_id):
-        self.model_id = model_id
-        self.max_retries = 3
-        self.retry_delay = 1  # seconds
-        
-    @tracer.capture_method
-    def generate_with_retry(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
-        """
-        Generate text with retry logic using Converse API
-        """
-        for attempt in range(self.max_retries):
-            try:
-                result = self._generate_converse(prompt, max_tokens)
-                if result:
-                    metrics.add_metric(name="SuccessfulGeneration", unit=MetricUnit.Count, value=1)
-                    return result
-            except Exception as e:
-                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay * (attempt + 1))
-                else:
-                    logger.error(f"All retries failed: {str(e)}")
-                    metrics.add_metric(name="FailedGeneration", unit=MetricUnit.Count, value=1)
-                    return None
-        return None
+# Warm-container read-aside cache over the papers table: pmid -> item
+PAPER_CACHE_TTL = 300  # seconds
+PAPER_CACHE_SIZE = 256
+_paper_cache = TTLCache(PAPER_CACHE_TTL, PAPER_CACHE_SIZE)
+
+def load_paper(pmid: str) -> Optional[Dict[str, Any]]:
+    """Fetch the fields used for summarisation and cache them"""
+    # ABSTRACT is a reserved word
+    paper_response = papers_table.get_item(
+        Key={'pmid': pmid},
+        ProjectionExpression='#a, #t',
+        ExpressionAttributeNames={'#a': 'abstract', '#t': 'title'}
+    )
+    paper = paper_response.get('Item')
+    if paper is not None:
+        _paper_cache.put(pmid, paper)
+    return paper
+
+SUMMARY_TYPES = ('short', 'medium', 'long')
+# Prefix of the placeholder stored when every retry failed; never served from cache
+FAILED_SUMMARY_PREFIX = "Unable to generate"
+
+def summary_key(pmid: str, model_id: str) -> str:
+    """Deterministic summaryId, so a paper's summaries per model live in one record"""
+    return hashlib.blake2b(f"{pmid}:{model_id}".encode(), digest_size=8).hexdigest()
+
+def model_attribute(name: str) -> str:
+    """Record attribute holding the model that generated one summary type"""
+    return f"{name}_model"
+
+def is_reusable(summary: Optional[str]) -> bool:
+    """Whether a stored summary can be returned instead of regenerating it"""
+    return bool(summary) and not summary.startswith(FAILED_SUMMARY_PREFIX)
+
+def store_summaries(summary_id: str, pmid: str, texts: Dict[str, str],
+                    models: Dict[str, str], existing: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add newly generated summaries to a record without replacing stored ones
     
-    @tracer.capture_method
-    def _generate_converse(self, prompt: str, max_tokens: int = 500) -> Optional[str]:
-        """
-        Generate text using Amazon Bedrock Converse API
-        """
-        try:
-            start_time = time.time()
-            
-            # Prepare messages
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "text": prompt
-                        }
-                    ]
-                }
-            ]
-            
-            inference_config = {
-                "maxTokens": max_tokens,
-                "temperature": 0.7,
-                "topP": 0.9
-            }
-            
-            logger.info(f"Calling Bedrock with model: {self.model_id}")
-            
-            # Call Converse API
-            response = bedrock.converse(
-                modelId=self.model_id,
-                messages=messages,
-                inferenceConfig=inference_config
-            )
-            
-            latency = time.time() - start_time
-            metrics.add_metric(name="BedrockLatency", unit=MetricUnit.Seconds, value=latency)
-            
-            # Parse the response correctly
-            if 'output' in response and 'message' in response['output']:
-                message = response['output']['message']
-                if 'content' in message and len(message['content']) > 0:
-                    content_item = message['content'][0]
-                    if 'text' in content_item:
-                        return content_item['text']
-            
-            # Try alternative response format
-            if 'results' in response:
-                return response['results'][0].get('outputText', '')
-            
-            logger.error(f"Unexpected response format: {json.dumps(response)}")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Bedrock Converse API error: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
+    Each text is written once, so a summaryId keeps naming the exact text a hash
+    was created from and concurrent requests for other types do not overwrite
+    each other. Only an empty or failed value left by an older write is replaced.
+    Returns the record as stored.
+    """
+    assignments = [
+        '#pmid = :pmid',
+        '#created = if_not_exists(#created, :created)',
+        '#model = if_not_exists(#model, :model)'
+    ]
+    conditions = []
+    names = {'#pmid': 'pmid', '#created': 'created_at', '#model': 'model'}
+    values = {':pmid': pmid, ':created': datetime.utcnow().isoformat(), ':model': bedrock_model_id}
+    for i, (name, text) in enumerate(texts.items()):
+        attributes = [(f'#s{i}', f':s{i}', name, text)]
+        if models.get(name):
+            attributes.append((f'#m{i}', f':m{i}', model_attribute(name), models[name]))
+        for attr_name, attr_value, attr, value in attributes:
+            names[attr_name] = attr
+            values[attr_value] = value
+            if name in existing:
+                assignments.append(f'{attr_name} = {attr_value}')
+            else:
+                assignments.append(f'{attr_name} = if_not_exists({attr_name}, {attr_value})')
+        if name in existing:
+            # Replace the unusable value only if no other request has replaced it
+            conditions.append(f'(#s{i} = :empty OR begins_with(#s{i}, :failed))')
+            values.update({':empty': '', ':failed': FAILED_SUMMARY_PREFIX})
     
-    @tracer.capture_method
-    def generate_short_summary(self, abstract: str) -> str:
-        """Generate 2-sentence summary"""
-        prompt = f"""Provide a concise 2-sentence summary of this medical abstract. Focus on the key finding and clinical significance.
+    update = {
+        'Key': {'summaryId': summary_id},
+        'UpdateExpression': 'SET ' + ', '.join(assignments),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+        'ReturnValues': 'ALL_NEW'
+    }
+    if conditions:
+        update['ConditionExpression'] = ' AND '.join(conditions)
+    try:
+        return summaries_table.update_item(**update).get('Attributes', {})
+    except summaries_table.meta.client.exceptions.ConditionalCheckFailedException:
+        # Another request filled the slot first; its text is the one to serve
+        return summaries_table.get_item(Key={'summaryId': summary_id}, ConsistentRead=True).get('Item', {})
+
+# Abstracts shorter than this, or fetch-pubmed's placeholders, are not sent to Bedrock
+MIN_ABSTRACT_LENGTH = 200
+PLACEHOLDER_ABSTRACT_PREFIXES = (
+    'Abstract not available',
+    'Error parsing abstract',
+    'This is a book chapter from:'
+)
+NO_ABSTRACT_SUMMARY = "No abstract is available to summarize for this paper."
+
+# Input budget per prompt; most of an abstract's signal is in its opening
+ABSTRACT_MAX_CHARS = 2000
+LONG_ABSTRACT_MAX_CHARS = 3000
+
+def clip_abstract(abstract: str, max_chars: int = ABSTRACT_MAX_CHARS) -> str:
+    """Trim an abstract to max_chars, ending on a sentence boundary when possible"""
+    if len(abstract) <= max_chars:
+        return abstract
+    cut = abstract.rfind('. ', 0, max_chars)
+    return abstract[:cut + 1] if cut > 0 else abstract[:max_chars]
+
+def has_summarizable_abstract(abstract: str) -> bool:
+    """Whether the abstract has enough real content to be worth a model call"""
+    abstract = abstract.strip()
+    return (len(abstract) >= MIN_ABSTRACT_LENGTH
+            and not abstract.startswith(PLACEHOLDER_ABSTRACT_PREFIXES))
+
+# Prompt templates, filled with the abstract per call
+SHORT_PROMPT_TEMPLATE = """Provide a concise 2-sentence summary of this medical abstract. Focus on the key finding and clinical significance.
 
 Abstract:
 {abstract}
@@ -131,14 +178,8 @@ Requirements:
 - Be accurate to the original research
 
 Summary:"""
-        
-        result = self.generate_with_retry(prompt, 150)
-        return result if result else "Unable to generate short summary."
-    
-    @tracer.capture_method
-    def generate_medium_summary(self, abstract: str) -> str:
-        """Generate paragraph-length summary"""
-        prompt = f"""Write a clear, professional summary of this medical abstract.
+
+MEDIUM_PROMPT_TEMPLATE = """Write a clear, professional summary of this medical abstract.
 
 Abstract:
 {abstract}
@@ -155,14 +196,8 @@ Requirements:
 - Approximately 150-200 words
 
 Summary:"""
-        
-        result = self.generate_with_retry(prompt, 300)
-        return result if result else "Unable to generate medium summary."
-    
-    @tracer.capture_method
-    def generate_long_summary(self, abstract: str) -> str:
-        """Generate detailed comprehensive summary"""
-        prompt = f"""Create a detailed, structured analysis of this medical abstract.
+
+LONG_PROMPT_TEMPLATE = """Create a detailed, structured analysis of this medical abstract.
 
 Abstract:
 {abstract}
@@ -198,9 +233,232 @@ Requirements:
 - Approximately 400-500 words
 
 Analysis:"""
+
+# Longest a single streamed generation may run before its partial text is used
+STREAM_TIME_BUDGET = 15  # seconds
+
+@lru_cache(maxsize=8)
+def get_inference_config(max_tokens: int) -> Dict[str, Any]:
+    """Converse inferenceConfig per output length, built once and shared read-only"""
+    return {
+        "maxTokens": max_tokens,
+        "temperature": 0.7,
+        "topP": 0.9
+    }
+
+# Bedrock errors worth retrying; anything else (validation, access) fails fast
+RETRIABLE_ERROR_CODES = frozenset({
+    'ThrottlingException',
+    'ModelTimeoutException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+    'InternalServerException',
+    'ModelStreamErrorException'
+})
+
+def is_retriable(error: Exception) -> bool:
+    """Whether a Bedrock call that raised error should be attempted again"""
+    if isinstance(error, ClientError):
+        # Errors raised mid-stream use camelCase codes (throttlingException)
+        code = error.response.get('Error', {}).get('Code', '')
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        return code[:1].upper() + code[1:] in RETRIABLE_ERROR_CODES or status >= 500
+    # Connection resets and read timeouts
+    return isinstance(error, BotoCoreError)
+
+def is_throttle(error: Exception) -> bool:
+    """Whether Bedrock rejected the call for exceeding the model's quota"""
+    return (isinstance(error, ClientError)
+            and error.response.get('Error', {}).get('Code', '').lower() == 'throttlingexception')
+
+# (name, unit, value) of one metric recorded while generating
+MetricSample = Tuple[str, MetricUnit, float]
+
+class Generation(NamedTuple):
+    """Generated text, the model that actually produced it and its metrics"""
+    text: str
+    model_id: str
+    # Cut off at the stream budget; served once but never stored
+    truncated: bool = False
+    # Generations run on worker threads, so they hand their metrics back for
+    # the handler thread to record instead of touching the shared Metrics
+    metrics: Tuple[MetricSample, ...] = ()
+
+def record_metrics(generation: Generation) -> None:
+    """Record a finished generation's metrics for this invocation"""
+    for name, unit, value in generation.metrics:
+        metrics.add_metric(name=name, unit=unit, value=value)
+
+class BedrockSummarizer:
+    """Handles AI summary generation using Amazon Bedrock"""
+    
+    def __init__(self, model_id: str = bedrock_model_id,
+                 fallback_model_id: str = bedrock_fallback_model_id):
+        self.model_id = model_id
+        # Tried in order; a throttled attempt moves on to the next one
+        self.model_ids = [model_id] + ([fallback_model_id] if fallback_model_id else [])
+        self.max_retries = 3
+        self.retry_delay = 0.2  # seconds, doubled per attempt
+        self.max_retry_delay = 8.0  # seconds
         
-        result = self.generate_with_retry(prompt, 600)
-        return result if result else "Unable to generate detailed summary."
+    def generate_with_retry(self, prompt: str, max_tokens: int = 500,
+                            deadline: Optional[float] = None) -> Generation:
+        """
+        Generate text with retry logic using Converse API
+        
+        deadline is a time.monotonic() value. Attempts, backoff and streaming all
+        stop early enough that even a read stalled for BEDROCK_READ_TIMEOUT ends
+        by then, so a caller that gives up at the deadline leaves no busy worker.
+        Returns an empty text when every attempt failed.
+        """
+        samples: List[MetricSample] = []
+        result = self._attempt_generation(prompt, max_tokens, deadline, samples)
+        if result is None:
+            samples.append(("FailedGeneration", MetricUnit.Count, 1))
+            result = Generation('', self.model_id)
+        return result._replace(metrics=tuple(samples))
+    
+    def _attempt_generation(self, prompt: str, max_tokens: int, deadline: Optional[float],
+                            samples: List[MetricSample]) -> Optional[Generation]:
+        """Run the attempts for generate_with_retry, adding metrics to samples"""
+        stop_at = None if deadline is None else deadline - BEDROCK_READ_TIMEOUT
+        model_index = 0
+        for attempt in range(self.max_retries):
+            if stop_at is not None and time.monotonic() >= stop_at:
+                logger.warning("No time left for another Bedrock attempt")
+                return None
+            model_id = self.model_ids[model_index]
+            try:
+                result = self._generate_converse(prompt, max_tokens, model_id, stop_at, samples)
+                if result:
+                    samples.append(("SuccessfulGeneration", MetricUnit.Count, 1))
+                    return result
+            except Exception as e:
+                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+                if not is_retriable(e):
+                    logger.error(f"Non-retriable Bedrock error: {str(e)}")
+                    return None
+                if is_throttle(e) and len(self.model_ids) > 1:
+                    model_index = (model_index + 1) % len(self.model_ids)
+                    samples.append(("ModelFallback", MetricUnit.Count, 1))
+                if attempt < self.max_retries - 1:
+                    # Full-jitter backoff so concurrent containers do not retry in lockstep
+                    delay = random.uniform(0, min(self.max_retry_delay, self.retry_delay * (2 ** attempt)))
+                    if stop_at is not None:
+                        delay = min(delay, max(0, stop_at - time.monotonic()))
+                    time.sleep(delay)
+                else:
+                    logger.error(f"All retries failed: {str(e)}")
+                    return None
+        return None
+    
+    def _generate_converse(self, prompt: str, max_tokens: int = 500,
+                           model_id: Optional[str] = None,
+                           stop_at: Optional[float] = None,
+                           samples: Optional[List[MetricSample]] = None) -> Optional[Generation]:
+        """
+        Generate text using Amazon Bedrock Converse API
+        
+        Latency and truncation metrics are appended to samples when given.
+        """
+        if samples is None:
+            samples = []
+        try:
+            start_time = time.monotonic()
+            # Stop reading at the stream budget or the caller's cut-off, whichever is first
+            stream_stop = start_time + STREAM_TIME_BUDGET
+            if stop_at is not None:
+                stream_stop = min(stream_stop, stop_at)
+            
+            # Prepare messages
+            messages = [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "text": prompt
+                        }
+                    ]
+                }
+            ]
+            
+            inference_config = get_inference_config(max_tokens)
+            
+            model_id = model_id or self.model_id
+            logger.info(f"Calling Bedrock with model: {model_id}")
+            
+            # Stream the completion so tokens are consumed as they arrive
+            response = bedrock.converse_stream(
+                modelId=model_id,
+                messages=messages,
+                inferenceConfig=inference_config
+            )
+            
+            chunks = []
+            truncated = False
+            first_token_latency = None
+            stream = response['stream']
+            for event in stream:
+                delta = event.get('contentBlockDelta')
+                if delta and 'text' in delta['delta']:
+                    if first_token_latency is None:
+                        first_token_latency = time.monotonic() - start_time
+                    chunks.append(delta['delta']['text'])
+                if time.monotonic() > stream_stop:
+                    # Keep what has arrived rather than lose the whole summary
+                    logger.warning("Bedrock stream ran out of time, truncating")
+                    samples.append(("TruncatedGeneration", MetricUnit.Count, 1))
+                    truncated = True
+                    stream.close()
+                    break
+            
+            latency = time.monotonic() - start_time
+            samples.append(("BedrockLatency", MetricUnit.Seconds, latency))
+            if first_token_latency is not None:
+                samples.append(("BedrockFirstTokenLatency", MetricUnit.Seconds, first_token_latency))
+            
+            if chunks:
+                return Generation(''.join(chunks), model_id, truncated)
+            
+            logger.error("Bedrock stream returned no text")
+            return None
+            
+        except Exception:
+            logger.exception("Bedrock Converse API error")
+            raise
+    
+    def generate_short_summary(self, abstract: str, deadline: Optional[float] = None) -> Generation:
+        """Generate 2-sentence summary"""
+        prompt = SHORT_PROMPT_TEMPLATE.format(abstract=abstract)
+        
+        result = self.generate_with_retry(prompt, 150, deadline)
+        return result if result.text else result._replace(text="Unable to generate short summary.")
+    
+    def generate_medium_summary(self, abstract: str, deadline: Optional[float] = None) -> Generation:
+        """Generate paragraph-length summary"""
+        prompt = MEDIUM_PROMPT_TEMPLATE.format(abstract=abstract)
+        
+        result = self.generate_with_retry(prompt, 300, deadline)
+        return result if result.text else result._replace(text="Unable to generate medium summary.")
+    
+    def generate_long_summary(self, abstract: str, deadline: Optional[float] = None) -> Generation:
+        """Generate detailed comprehensive summary"""
+        prompt = LONG_PROMPT_TEMPLATE.format(abstract=abstract)
+        
+        result = self.generate_with_retry(prompt, 600, deadline)
+        return result if result.text else result._replace(text="Unable to generate detailed summary.")
+
+# Stateless apart from the model ID, so one instance serves every invocation
+summarizer = BedrockSummarizer()
+
+# Worker threads for the concurrent summary calls, kept across warm invocations.
+# Results are abandoned after SUMMARY_TIMEOUT, which stays under the 30s function timeout
+SUMMARY_TIMEOUT = 25  # seconds
+# Generations are bounded by the deadline they are given, so abandoned ones free
+# their worker by the time the handler gives up on them. Paper reads use their
+# own pool so they never queue behind generations
+summary_executor = ThreadPoolExecutor(max_workers=3)
+paper_executor = ThreadPoolExecutor(max_workers=2)
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
@@ -209,7 +467,7 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     """
     Main Lambda handler
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.debug("Received event", extra={'event': event})
     metrics.add_metric(name="InvocationCount", unit=MetricUnit.Count, value=1)
     
     try:
@@ -217,18 +475,18 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         body = {}
         if event.get('body'):
             try:
-                body = json.loads(event['body'])
-            except json.JSONDecodeError:
+                body = orjson.loads(event['body'])
+            except orjson.JSONDecodeError:
                 return {
                     'statusCode': 400,
                     'headers': {
                         'Content-Type': 'application/json',
                         'Access-Control-Allow-Origin': '*'
                     },
-                    'body': json.dumps({
+                    'body': orjson.dumps({
                         'error': 'Invalid JSON',
                         'message': 'Request body must be valid JSON'
-                    })
+                    }).decode()
                 }
         
         pmid = body.get('pmid')
@@ -241,28 +499,69 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({'error': 'PMID required'})
+                'body': orjson.dumps({'error': 'PMID required'}).decode()
+            }
+        
+        logger.info("Summary requested", extra={'pmid': pmid, 'type': summary_type})
+        tracer.put_annotation(key="pmid", value=pmid)
+        
+        requested = [name for name in SUMMARY_TYPES if summary_type in [name, 'all']]
+        summary_id = summary_key(pmid, bedrock_model_id)
+        
+        # The paper read and the stored-summary read are independent, so start
+        # the paper read in the background unless it is already cached
+        paper = _paper_cache.get(pmid)
+        paper_future = None if paper is not None else paper_executor.submit(load_paper, pmid)
+        
+        # Reuse summaries already generated for this paper and model
+        existing = {}
+        try:
+            existing = summaries_table.get_item(Key={'summaryId': summary_id}).get('Item', {})
+        except Exception as e:
+            logger.warning(f"Error checking existing summaries: {str(e)}")
+            # Continue and regenerate if DynamoDB fails
+        
+        if existing and all(is_reusable(existing.get(name)) for name in requested):
+            logger.info(f"Returning stored summary {summary_id}")
+            metrics.add_metric(name="CachedSummary", unit=MetricUnit.Count, value=1)
+            # Records written before per-type models only carry the record's model
+            models = {name: existing.get(model_attribute(name)) or existing.get('model', bedrock_model_id)
+                      for name in requested}
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': orjson.dumps({
+                    'summaryId': summary_id,
+                    'pmid': pmid,
+                    'summaries': {name: existing[name] for name in requested},
+                    'created_at': existing.get('created_at'),
+                    'cached': True,
+                    'model': bedrock_model_id,
+                    'models': models
+                }).decode()
             }
         
         # Get paper from DynamoDB
         try:
-            paper_response = papers_table.get_item(Key={'pmid': pmid})
+            if paper_future is not None:
+                paper = paper_future.result()
             
-            if 'Item' not in paper_response:
+            if paper is None:
                 return {
                     'statusCode': 404,
                     'headers': {
                         'Content-Type': 'application/json',
                         'Access-Control-Allow-Origin': '*'
                     },
-                    'body': json.dumps({
+                    'body': orjson.dumps({
                         'error': 'Paper not found',
                         'message': f'No paper found with PMID {pmid}. Please fetch it first.'
-                    })
+                    }).decode()
                 }
             
-            paper = paper_response['Item']
-            
         except Exception as e:
             logger.error(f"Error fetching paper: {str(e)}")
             return {
@@ -271,65 +570,107 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({'error': 'Database error'})
+                'body': orjson.dumps({'error': 'Database error'}).decode()
             }
         
-        # Initialize summarizer with correct model ID
-        summarizer = BedrockSummarizer()
-        
         # Generate summaries
-        summaries = {}
+        generators = {
+            'short': summarizer.generate_short_summary,
+            'medium': summarizer.generate_medium_summary,
+            'long': summarizer.generate_long_summary
+        }
+        # Only generate what the stored record does not already have
+        summaries = {name: existing[name] for name in requested if is_reusable(existing.get(name))}
+        pending = [name for name in requested if name not in summaries]
+        # Which model produced each summary; a throttled primary falls back to another
+        models = {name: existing.get(model_attribute(name)) or existing.get('model', bedrock_model_id)
+                  for name in summaries}
+        truncated = set()
         
         try:
-            if summary_type in ['short', 'all']:
-                summaries['short'] = summarizer.generate_short_summary(paper['abstract'])
-                logger.info("Generated short summary")
-            
-            if summary_type in ['medium', 'all']:
-                summaries['medium'] = summarizer.generate_medium_summary(paper['abstract'])
-                logger.info("Generated medium summary")
-            
-            if summary_type in ['long', 'all']:
-                summaries['long'] = summarizer.generate_long_summary(paper['abstract'])
-                logger.info("Generated long summary")
+            if not has_summarizable_abstract(paper.get('abstract', '')):
+                # Nothing for the model to work with; skip Bedrock entirely
+                logger.info(f"Abstract for {pmid} too short to summarize")
+                metrics.add_metric(name="SkippedGeneration", unit=MetricUnit.Count, value=1)
+                summaries.update((name, NO_ABSTRACT_SUMMARY) for name in pending)
+            else:
+                # Bound input tokens; the long summary gets a larger budget
+                clipped = clip_abstract(paper['abstract'])
+                clipped_long = clip_abstract(paper['abstract'], LONG_ABSTRACT_MAX_CHARS)
                 
+                # Each Bedrock call is a blocking round-trip, so run them side by side
+                deadline = time.monotonic() + SUMMARY_TIMEOUT
+                futures = {
+                    name: summary_executor.submit(
+                        generators[name], clipped_long if name == 'long' else clipped, deadline
+                    )
+                    for name in pending
+                }
+                try:
+                    for name, future in futures.items():
+                        generation = future.result(timeout=max(0, deadline - time.monotonic()))
+                        record_metrics(generation)
+                        summaries[name], models[name] = generation.text, generation.model_id
+                        if generation.truncated:
+                            truncated.add(name)
+                        logger.info(f"Generated {name} summary")
+                finally:
+                    for future in futures.values():
+                        future.cancel()
+                
+        except FuturesTimeoutError:
+            logger.error(f"Summary generation for {pmid} exceeded {SUMMARY_TIMEOUT}s")
+            metrics.add_metric(name="GenerationTimeout", unit=MetricUnit.Count, value=1)
+            return {
+                'statusCode': 504,
+                'headers': {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*'
+                },
+                'body': orjson.dumps({
+                    'error': 'Summary generation timed out',
+                    'message': 'AI service did not respond in time'
+                }).decode()
+            }
         except Exception as e:
-            logger.error(f"Error generating summaries: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error generating summaries")
             return {
                 'statusCode': 500,
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': 'Summary generation failed',
                     'message': f'AI service error: {str(e)}'
-                })
+                }).decode()
             }
         
-        # Create summary record
-        summary_id = hashlib.sha256(
-            f"{pmid}:{time.time()}:{paper.get('title', '')}".encode()
-        ).hexdigest()[:16]
-        
-        summary_record = {
-            'summaryId': summary_id,
-            'pmid': pmid,
-            'short': summaries.get('short', ''),
-            'medium': summaries.get('medium', ''),
-            'long': summaries.get('long', ''),
-            'created_at': datetime.utcnow().isoformat(),
-            'model': bedrock_model_id,
-            'summary_type': summary_type
-        }
+        # Persist only what this request generated; failed placeholders and cut-off
+        # text are left out so a later request can still fill their slot
+        generated = {name: summaries[name] for name in pending
+                     if is_reusable(summaries[name]) and name not in truncated}
+        stored = existing
+        if generated:
+            try:
+                stored = store_summaries(summary_id, pmid, generated, models, existing)
+                logger.info(f"Stored summary {summary_id}")
+            except Exception as e:
+                logger.error(f"Error storing summary: {str(e)}")
         
-        # Store in DynamoDB
-        try:
-            summaries_table.put_item(Item=summary_record)
-            logger.info(f"Stored summary {summary_id}")
-        except Exception as e:
-            logger.error(f"Error storing summary: {str(e)}")
+        # Serve the stored texts, which a concurrent request may have written first,
+        # so the response matches what the summaryId names
+        for name in requested:
+            if is_reusable(stored.get(name)):
+                summaries[name] = stored[name]
+                truncated.discard(name)
+                if stored.get(model_attribute(name)):
+                    models[name] = stored[model_attribute(name)]
+        summaries = {name: summaries[name] for name in requested}
+        created_at = stored.get('created_at') or datetime.utcnow().isoformat()
+        # A summaryId is only handed out when the record holds every served text;
+        # failed, cut-off or unsaved text cannot be fetched or hashed by that ID
+        persisted = all(is_reusable(stored.get(name)) for name in requested)
         
         return {
             'statusCode': 200,
@@ -337,24 +678,25 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
-                'summaryId': summary_id,
+            'body': orjson.dumps({
+                'summaryId': summary_id if persisted else None,
                 'pmid': pmid,
                 'summaries': summaries,
-                'created_at': summary_record['created_at'],
+                'created_at': created_at,
                 'cached': False,
-                'model': bedrock_model_id
-            })
+                'model': bedrock_model_id,
+                'models': models,
+                'truncated': sorted(truncated)
+            }).decode()
         }
         
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())
+    except Exception:
+        logger.exception("Unexpected error")
         return {
             'statusCode': 500,
             'headers': {
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({'error': 'Internal server error'})
+            'body': orjson.dumps({'error': 'Internal server error'}).decode()
         }
\ No newline at end of file
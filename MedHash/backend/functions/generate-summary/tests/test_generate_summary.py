@@ -4,11 +4,24 @@ Unit tests for generate-summary function
 
 import pytest
 import json
+import time
 from unittest.mock import patch, MagicMock
+import app
 from app import lambda_handler, BedrockSummarizer
 
 class TestGenerateSummary:
     
+    @pytest.fixture(autouse=True)
+    def clear_paper_cache(self):
+        app._paper_cache.clear()
+        yield
+        app._paper_cache.clear()
+    
+    @pytest.fixture(autouse=True)
+    def no_stored_summary(self):
+        with patch('app.summaries_table.get_item', return_value={}) as mock_get:
+            yield mock_get
+    
     @pytest.fixture
     def valid_event(self):
         return {
@@ -24,7 +37,12 @@ class TestGenerateSummary:
             'Item': {
                 'pmid': '12345678',
                 'title': 'Test Paper',
-                'abstract': 'This is a test abstract for a medical paper.'
+                'abstract': (
+                    'This is a test abstract for a medical paper. '
+                    'It describes a randomized controlled trial of a new treatment '
+                    'compared with standard care, reports the primary outcome and '
+                    'discusses the clinical significance of the findings.'
+                )
             }
         }
     
@@ -41,27 +59,36 @@ class TestGenerateSummary:
     @patch('app.BedrockSummarizer.generate_short_summary')
     @patch('app.BedrockSummarizer.generate_medium_summary')
     @patch('app.BedrockSummarizer.generate_long_summary')
-    @patch('app.summaries_table.put_item')
-    def test_generate_all_summaries(self, mock_put, mock_long, mock_medium, mock_short, mock_get, valid_event, mock_paper):
+    @patch('app.summaries_table.update_item')
+    def test_generate_all_summaries(self, mock_update, mock_long, mock_medium, mock_short, mock_get, valid_event, mock_paper):
         mock_get.return_value = mock_paper
-        mock_short.return_value = 'Short summary'
-        mock_medium.return_value = 'Medium summary'
-        mock_long.return_value = 'Long summary'
-        mock_put.return_value = {}
+        mock_short.return_value = app.Generation('Short summary', app.bedrock_model_id)
+        mock_medium.return_value = app.Generation('Medium summary', app.bedrock_model_id)
+        mock_long.return_value = app.Generation('Long summary', app.bedrock_model_id)
+        mock_update.return_value = {
+            'Attributes': {
+                'pmid': '12345678',
+                'short': 'Short summary',
+                'medium': 'Medium summary',
+                'long': 'Long summary',
+                'created_at': '2024-01-01T00:00:00'
+            }
+        }
         
         response = lambda_handler(valid_event, None)
         assert response['statusCode'] == 200
         body = json.loads(response['body'])
-        assert 'summaryId' in body
+        assert body['summaryId'] == app.summary_key('12345678', app.bedrock_model_id)
         assert 'short' in body['summaries']
         assert 'medium' in body['summaries']
         assert 'long' in body['summaries']
     
     @patch('app.papers_table.get_item')
     @patch('app.BedrockSummarizer.generate_short_summary')
-    def test_generate_short_only(self, mock_short, mock_get, mock_paper):
+    @patch('app.summaries_table.update_item', return_value={})
+    def test_generate_short_only(self, mock_update, mock_short, mock_get, mock_paper):
         mock_get.return_value = mock_paper
-        mock_short.return_value = 'Short summary'
+        mock_short.return_value = app.Generation('Short summary', app.bedrock_model_id)
         
         event = {
             'body': json.dumps({
@@ -76,6 +103,218 @@ class TestGenerateSummary:
         assert 'short' in body['summaries']
         assert 'medium' not in body['summaries']
     
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    @patch('app.summaries_table.update_item', return_value={})
+    def test_short_abstract_skips_bedrock(self, mock_update, mock_short, mock_get):
+        mock_get.return_value = {
+            'Item': {
+                'pmid': '12345678',
+                'title': 'Test Paper',
+                'abstract': 'Abstract not available for this article.'
+            }
+        }
+        
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'type': 'short'
+            })
+        }
+        
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['summaries']['short'] == app.NO_ABSTRACT_SUMMARY
+        mock_short.assert_not_called()
+    
+    @patch('app.SUMMARY_TIMEOUT', 0.05)
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    def test_generation_timeout(self, mock_short, mock_get, mock_paper):
+        mock_get.return_value = mock_paper
+        mock_short.side_effect = lambda abstract, deadline=None: time.sleep(0.5) or app.Generation('Short summary', app.bedrock_model_id)
+        
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'type': 'short'
+            })
+        }
+        
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 504
+    
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    def test_stored_summary_reused(self, mock_short, mock_get, no_stored_summary):
+        no_stored_summary.return_value = {
+            'Item': {
+                'summaryId': app.summary_key('12345678', app.bedrock_model_id),
+                'pmid': '12345678',
+                'short': 'Stored short summary',
+                'medium': '',
+                'long': '',
+                'created_at': '2024-01-01T00:00:00'
+            }
+        }
+        
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'type': 'short'
+            })
+        }
+        
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['cached'] is True
+        assert body['summaries'] == {'short': 'Stored short summary'}
+        mock_short.assert_not_called()
+    
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    @patch('app.summaries_table.update_item')
+    def test_stored_text_is_write_once(self, mock_update, mock_short, mock_get, mock_paper):
+        mock_get.return_value = mock_paper
+        mock_short.return_value = app.Generation('Short summary', app.bedrock_model_id)
+        mock_update.return_value = {
+            'Attributes': {
+                'pmid': '12345678',
+                'short': 'Short summary from an earlier request',
+                'created_at': '2024-01-01T00:00:00'
+            }
+        }
+        
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'type': 'short'
+            })
+        }
+        
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['summaries'] == {'short': 'Short summary from an earlier request'}
+        assert body['created_at'] == '2024-01-01T00:00:00'
+        
+        update = mock_update.call_args[1]
+        assert 'if_not_exists(#s0, :s0)' in update['UpdateExpression']
+        assert update['ExpressionAttributeNames']['#s0'] == 'short'
+        assert 'medium' not in update['ExpressionAttributeNames'].values()
+    
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    @patch('app.summaries_table.update_item')
+    def test_truncated_summary_not_stored(self, mock_update, mock_short, mock_get, mock_paper):
+        mock_get.return_value = mock_paper
+        mock_short.return_value = app.Generation('Partial summ', app.bedrock_model_id, truncated=True)
+    
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'type': 'short'
+            })
+        }
+    
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['summaries'] == {'short': 'Partial summ'}
+        assert body['truncated'] == ['short']
+        assert body['summaryId'] is None
+        mock_update.assert_not_called()
+    
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    @patch('app.BedrockSummarizer.generate_medium_summary')
+    @patch('app.BedrockSummarizer.generate_long_summary')
+    @patch('app.summaries_table.update_item')
+    def test_all_generations_failed(self, mock_update, mock_long, mock_medium, mock_short, mock_get, valid_event, mock_paper):
+        mock_get.return_value = mock_paper
+        failed = app.Generation(f"{app.FAILED_SUMMARY_PREFIX} summary at this time.", app.bedrock_model_id)
+        mock_short.return_value = failed
+        mock_medium.return_value = failed
+        mock_long.return_value = failed
+        
+        response = lambda_handler(valid_event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['summaryId'] is None
+        assert all(text == failed.text for text in body['summaries'].values())
+        mock_update.assert_not_called()
+    
+    @patch('app.time.sleep')
+    @patch('app.BedrockSummarizer._generate_converse')
+    def test_throttle_falls_back_and_reports_model(self, mock_converse, mock_sleep):
+        throttled = app.ClientError(
+            {'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}},
+            'ConverseStream'
+        )
+        mock_converse.side_effect = [throttled, app.Generation('Fallback text', 'fallback-model')]
+    
+        summarizer = BedrockSummarizer('primary-model', 'fallback-model')
+        result = summarizer.generate_with_retry('prompt', 150)
+    
+        assert (result.text, result.model_id) == ('Fallback text', 'fallback-model')
+        assert mock_converse.call_args[0][2] == 'fallback-model'
+        assert [sample[0] for sample in result.metrics] == ['ModelFallback', 'SuccessfulGeneration']
+    
+    @patch('app.metrics.add_metric')
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    @patch('app.summaries_table.update_item', return_value={})
+    def test_generation_metrics_recorded_by_handler(self, mock_update, mock_short, mock_get, mock_add_metric, mock_paper):
+        mock_get.return_value = mock_paper
+        mock_short.return_value = app.Generation(
+            'Short summary', app.bedrock_model_id,
+            metrics=(('BedrockLatency', app.MetricUnit.Seconds, 1.5),)
+        )
+        
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'type': 'short'
+            })
+        }
+        
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        mock_add_metric.assert_any_call(name='BedrockLatency', unit=app.MetricUnit.Seconds, value=1.5)
+    
+    @patch('app.papers_table.get_item')
+    @patch('app.BedrockSummarizer.generate_short_summary')
+    @patch('app.summaries_table.update_item', return_value={})
+    def test_fallback_model_reported_per_type(self, mock_update, mock_short, mock_get, mock_paper):
+        mock_get.return_value = mock_paper
+        mock_short.return_value = app.Generation('Short summary', 'fallback-model')
+    
+        event = {
+            'body': json.dumps({
+                'pmid': '12345678',
+                'type': 'short'
+            })
+        }
+    
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['model'] == app.bedrock_model_id
+        assert body['models'] == {'short': 'fallback-model'}
+    
+    def test_clip_abstract(self):
+        short = 'A short abstract.'
+        assert app.clip_abstract(short) == short
+        
+        long_abstract = 'First sentence here. ' * 200
+        clipped = app.clip_abstract(long_abstract, 100)
+        assert len(clipped) <= 100
+        assert clipped.endswith('.')
+        
+        assert app.clip_abstract('x' * 300, 100) == 'x' * 100
+    
     def test_bedrock_summarizer_initialization(self):
         summarizer = BedrockSummarizer()
         assert summarizer.model_id is not None
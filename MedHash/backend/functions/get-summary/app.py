@@ -1,10 +1,9 @@
-import json
+import orjson
 import boto3
 import os
 from datetime import datetime
 from decimal import Decimal
 import logging
-import traceback
 from typing import Dict, Any, Optional  # ← THIS IS CRITICAL - adds Dict, Any, Optional
 
 # For Lambda Powertools (if you're using them)
@@ -25,18 +24,17 @@ summaries_table = dynamodb.Table(summaries_table_name)
 papers_table = dynamodb.Table(papers_table_name)
 verifications_table = dynamodb.Table(verifications_table_name)
 
-class DecimalEncoder(json.JSONEncoder):
-    """Custom JSON encoder for Decimal types"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super(DecimalEncoder, self).default(obj)
+def decimal_default(obj: Any) -> Any:
+    """orjson default hook for the Decimal values DynamoDB returns"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Get a specific summary by ID
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.debug("Received event: %s", event)
     
     # Standard CORS headers
     headers = {
@@ -62,9 +60,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return {
                 'statusCode': 400,
                 'headers': headers,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': 'Summary ID required'
-                })
+                }).decode()
             }
         
         logger.info(f"Fetching summary: {summary_id}")
@@ -77,16 +75,27 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return {
                 'statusCode': 404,
                 'headers': headers,
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': 'Summary not found'
-                })
+                }).decode()
             }
         
         summary = response['Item']
         logger.info(f"Found summary for PMID: {summary.get('pmid')}")
         
         # Get associated paper details
-        paper_response = papers_table.get_item(Key={'pmid': summary['pmid']})
+        # Only the fields echoed back below
+        paper_response = papers_table.get_item(
+            Key={'pmid': summary['pmid']},
+            ProjectionExpression='#t, #a, #j, #p, #d',
+            ExpressionAttributeNames={
+                '#t': 'title',
+                '#a': 'authors',
+                '#j': 'journal',
+                '#p': 'pubdate',
+                '#d': 'doi'
+            }
+        )
         paper = paper_response.get('Item', {})
         
         # Get blockchain verification if exists
@@ -123,17 +132,16 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {
             'statusCode': 200,
             'headers': headers,
-            'body': json.dumps(response_data, cls=DecimalEncoder)
+            'body': orjson.dumps(response_data, default=decimal_default).decode()
         }
         
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Unexpected error")
         return {
             'statusCode': 500,
             'headers': headers,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Internal server error',
                 'message': str(e)
-            })
+            }).decode()
         }
\ No newline at end of file
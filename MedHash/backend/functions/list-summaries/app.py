@@ -3,7 +3,7 @@ List Summaries Function
 Retrieves all summaries for a user with pagination
 """
 
-import json
+import orjson
 import boto3
 import os
 from datetime import datetime
@@ -27,12 +27,11 @@ verifications_table_name = os.environ.get('VERIFICATIONS_TABLE', 'medhash-verifi
 summaries_table = dynamodb.Table(summaries_table_name)
 verifications_table = dynamodb.Table(verifications_table_name)
 
-class DecimalEncoder(json.JSONEncoder):
-    """Custom JSON encoder for Decimal types"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super(DecimalEncoder, self).default(obj)
+def decimal_default(obj: Any) -> Any:
+    """orjson default hook for the Decimal values DynamoDB returns"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
@@ -41,7 +40,7 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     """
     List all summaries with optional pagination and filtering
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.debug("Received event", extra={'event': event})
     metrics.add_metric(name="InvocationCount", unit=MetricUnit.Count, value=1)
     
     try:
@@ -126,27 +125,26 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                 'Access-Control-Allow-Methods': 'GET,OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'
             },
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'summaries': items,
                 'pagination': {
                     'lastKey': last_key.get('summaryId') if last_key else None,
                     'limit': limit,
                     'total': response.get('ScannedCount', 0)
                 }
-            }, cls=DecimalEncoder)
+            }, default=decimal_default).decode()
         }
         
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())
+    except Exception:
+        logger.exception("Unexpected error")
         return {
             'statusCode': 500,
             'headers': {
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': 'Internal server error',
                 'message': 'Failed to retrieve summaries'
-            })
+            }).decode()
         }
\ No newline at end of file
@@ -1,13 +1,15 @@
-import json
+import orjson
 import boto3
+from botocore.config import Config
 import os
+import time
 from datetime import datetime
 import logging
 from typing import Dict, Any, Optional
-import traceback
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from medhash_utils import TTLCache
 from decimal import Decimal
 
 # Configure Powertools
@@ -15,17 +17,26 @@ logger = Logger(service="medhash-verify-hash")
 tracer = Tracer(service="medhash-verify-hash")
 metrics = Metrics(namespace="MedHash", service="verify-hash")
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
+# Initialize DynamoDB with keep-alive so warm invocations reuse connections
+boto_config = Config(
+    max_pool_connections=10,
+    tcp_keepalive=True,
+    retries={'max_attempts': 3, 'mode': 'adaptive'}
+)
+dynamodb = boto3.resource('dynamodb', config=boto_config)
 verifications_table_name = os.environ.get('VERIFICATIONS_TABLE', 'medhash-verifications-dev')
 verifications_table = dynamodb.Table(verifications_table_name)
 
-class DecimalEncoder(json.JSONEncoder):
-    """Custom JSON encoder for Decimal types"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return int(obj) if obj % 1 == 0 else float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Warm-container cache of each record's immutable fields: hash -> record
+RECORD_CACHE_TTL = 30  # seconds
+RECORD_CACHE_SIZE = 1024
+_record_cache = TTLCache(RECORD_CACHE_TTL, RECORD_CACHE_SIZE)
+
+def decimal_default(obj: Any) -> Any:
+    """orjson default hook for the Decimal values DynamoDB returns"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
@@ -34,9 +45,13 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
     """
     Main Lambda handler
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.debug("Received event", extra={'event': event})
     metrics.add_metric(name="InvocationCount", unit=MetricUnit.Count, value=1)
     
+    # Read the clock once so every timestamp in the response agrees
+    now_epoch = time.time()
+    now_iso = datetime.utcfromtimestamp(now_epoch).isoformat()
+    
     try:
         # Get hash from path parameters
         path_params = event.get('pathParameters') or {}
@@ -54,11 +69,11 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'verified': False,
                     'error': 'Hash required',
                     'message': 'Please provide a hash value to verify'
-                })
+                }).decode()
             }
         
         # Clean hash value (remove any prefixes)
@@ -68,66 +83,60 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
         
         logger.info(f"Verifying hash: {hash_value}")
         
-        # Look up in DynamoDB
+        # Look up and count the verification in one atomic round-trip. The
+        # count is always incremented in DynamoDB; when the rest of the record
+        # is cached only the updated attributes need to come back
+        cached = _record_cache.get(hash_value)
         try:
-            response = verifications_table.get_item(Key={'hash': hash_value})
-        except Exception as e:
-            logger.error(f"DynamoDB error: {str(e)}")
+            response = verifications_table.update_item(
+                Key={'hash': hash_value},
+                UpdateExpression='ADD verification_count :one SET last_verified = :time',
+                ConditionExpression='attribute_exists(#h)',
+                ExpressionAttributeNames={'#h': 'hash'},
+                ExpressionAttributeValues={
+                    ':one': 1,
+                    ':time': now_iso
+                },
+                ReturnValues='UPDATED_NEW' if cached else 'ALL_NEW'
+            )
+        except verifications_table.meta.client.exceptions.ConditionalCheckFailedException:
+            logger.info(f"Hash not found: {hash_value}")
+            metrics.add_metric(name="HashNotFound", unit=MetricUnit.Count, value=1)
             return {
-                'statusCode': 503,
+                'statusCode': 404,
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'verified': False,
-                    'error': 'Database error',
-                    'message': 'Unable to access verification database'
-                })
+                    'hash': hash_value,
+                    'message': 'Hash not found in registry',
+                    'timestamp': now_iso
+                }).decode()
             }
-        
-        if 'Item' not in response:
-            logger.info(f"Hash not found: {hash_value}")
-            metrics.add_metric(name="HashNotFound", unit=MetricUnit.Count, value=1)
+        except Exception as e:
+            logger.error(f"DynamoDB error: {str(e)}")
             return {
-                'statusCode': 404,
+                'statusCode': 503,
                 'headers': {
                     'Content-Type': 'application/json',
                     'Access-Control-Allow-Origin': '*'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'verified': False,
-                    'hash': hash_value,
-                    'message': 'Hash not found in registry',
-                    'timestamp': datetime.utcnow().isoformat()
-                })
+                    'error': 'Database error',
+                    'message': 'Unable to access verification database'
+                }).decode()
             }
         
-        record = response['Item']
-        logger.info(f"Found record for hash {hash_value}")
-        
-        # Increment verification count
-        current_count = record.get('verification_count', 0)
-        # Convert Decimal to int if necessary
-        if isinstance(current_count, Decimal):
-            current_count = int(current_count)
-        new_count = current_count + 1
-        
-        try:
-            # Update the verification count
-            verifications_table.update_item(
-                Key={'hash': hash_value},
-                UpdateExpression='SET verification_count = :count, last_verified = :time',
-                ExpressionAttributeValues={
-                    ':count': new_count,
-                    ':time': datetime.utcnow().isoformat()
-                },
-                ReturnValues='UPDATED_NEW'
-            )
-            logger.info(f"Incremented verification count to {new_count}")
-        except Exception as e:
-            logger.error(f"Error updating verification count: {str(e)}")
-            # Continue even if update fails
+        if cached:
+            record = {**cached, **response['Attributes']}
+        else:
+            record = response['Attributes']
+            _record_cache.put(hash_value, record)
+        new_count = int(record['verification_count'])
+        logger.info(f"Incremented verification count for {hash_value} to {new_count}")
         
         metrics.add_metric(name="HashVerified", unit=MetricUnit.Count, value=1)
         
@@ -140,8 +149,8 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
             'paper_title': record.get('paper_title'),
             'created_at': record.get('created_at'),
             'verification_count': new_count,
-            'last_verified': datetime.utcnow().isoformat(),
-            'timestamp': int(datetime.utcnow().timestamp())
+            'last_verified': now_iso,
+            'timestamp': int(now_epoch)
         }
         
         # Include blockchain data if available
@@ -158,12 +167,11 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps(response_data, cls=DecimalEncoder)
+            'body': orjson.dumps(response_data, default=decimal_default).decode()
         }
         
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())
+    except Exception:
+        logger.exception("Unexpected error")
         metrics.add_metric(name="UnhandledError", unit=MetricUnit.Count, value=1)
         return {
             'statusCode': 500,
@@ -171,9 +179,9 @@ def lambda_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, A
                 'Content-Type': 'application/json',
                 'Access-Control-Allow-Origin': '*'
             },
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'verified': False,
                 'error': 'Internal server error',
                 'message': 'An unexpected error occurred during verification'
-            })
+            }).decode()
         }
\ No newline at end of file
@@ -6,10 +6,17 @@ import pytest
 import json
 from unittest.mock import patch, MagicMock
 from datetime import datetime
+import app
 from app import lambda_handler
 
 class TestVerifyHash:
     
+    @pytest.fixture(autouse=True)
+    def clear_record_cache(self):
+        app._record_cache.clear()
+        yield
+        app._record_cache.clear()
+    
     @pytest.fixture
     def valid_event(self):
         return {
@@ -20,35 +27,57 @@ class TestVerifyHash:
     
     @pytest.fixture
     def mock_record(self):
+        # update_item returns the record after ADD verification_count :one
         return {
-            'Item': {
+            'Attributes': {
                 'hash': 'abc123def456',
                 'pmid': '12345678',
                 'summaryId': 'test123',
                 'paper_title': 'Test Paper',
                 'created_at': '2024-01-01T00:00:00Z',
-                'verification_count': 5
+                'verification_count': 6
             }
         }
     
-    @patch('app.verifications_table.get_item')
-    def test_verify_existing_hash(self, mock_get_item, valid_event, mock_record):
-        mock_get_item.return_value = mock_record
+    @pytest.fixture
+    def hash_not_found(self):
+        exceptions = app.verifications_table.meta.client.exceptions
+        return exceptions.ConditionalCheckFailedException(
+            {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem'
+        )
+    
+    @patch('app.verifications_table.update_item')
+    def test_verify_existing_hash(self, mock_update, valid_event, mock_record):
+        mock_update.return_value = mock_record
         
-        with patch('app.verifications_table.update_item') as mock_update:
-            mock_update.return_value = {}
-            
-            response = lambda_handler(valid_event, None)
-            
-            assert response['statusCode'] == 200
-            body = json.loads(response['body'])
-            assert body['verified'] is True
-            assert body['hash'] == 'abc123def456'
-            assert body['verification_count'] == 6  # Incremented
+        response = lambda_handler(valid_event, None)
+        
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['verified'] is True
+        assert body['hash'] == 'abc123def456'
+        assert body['verification_count'] == 6  # Incremented
+        assert 'ADD verification_count :one' in mock_update.call_args.kwargs['UpdateExpression']
+    
+    @patch('app.verifications_table.update_item')
+    def test_verify_cached_record(self, mock_update, valid_event, mock_record):
+        mock_update.return_value = mock_record
+        lambda_handler(valid_event, None)
+        
+        mock_update.return_value = {
+            'Attributes': {'verification_count': 7, 'last_verified': '2024-01-02T00:00:00'}
+        }
+        response = lambda_handler(valid_event, None)
+        
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['verification_count'] == 7
+        assert body['pmid'] == '12345678'
+        assert mock_update.call_args.kwargs['ReturnValues'] == 'UPDATED_NEW'
     
-    @patch('app.verifications_table.get_item')
-    def test_verify_nonexistent_hash(self, mock_get_item, valid_event):
-        mock_get_item.return_value = {}
+    @patch('app.verifications_table.update_item')
+    def test_verify_nonexistent_hash(self, mock_update, valid_event, hash_not_found):
+        mock_update.side_effect = hash_not_found
         
         response = lambda_handler(valid_event, None)
         
@@ -66,15 +95,15 @@ class TestVerifyHash:
         assert body['verified'] is False
         assert 'error' in body
     
-    def test_verify_with_query_param(self):
+    def test_verify_with_query_param(self, hash_not_found):
         event = {
             'queryStringParameters': {
                 'hash': 'abc123'
             }
         }
         
-        with patch('app.verifications_table.get_item') as mock_get:
-            mock_get.return_value = {}
+        with patch('app.verifications_table.update_item') as mock_update:
+            mock_update.side_effect = hash_not_found
             
             response = lambda_handler(event, None)
             # Should return 404, but not 400
@@ -3,6 +3,7 @@ Common utilities package for MedHash Lambda functions
 """
 
 from .medhash_utils import (
+    TTLCache,
     DynamoDBClient,
     HashGenerator,
     CryptoUtils,
@@ -37,6 +38,7 @@ from .medhash_utils import (
 )
 
 __all__ = [
+    'TTLCache',
     'DynamoDBClient',
     'HashGenerator',
     'CryptoUtils',
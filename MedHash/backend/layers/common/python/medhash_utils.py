@@ -8,27 +8,115 @@ import hashlib
 import hmac
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
-import boto3
+from typing import Dict, Any, Optional, List, Tuple, Union, Iterator
 from botocore.exceptions import ClientError
-import uuid
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder outside the layer
+    orjson = None
 import re
 import base64
-import zlib
 from decimal import Decimal
 import time
 import random
+import secrets
 import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from operator import xor
 
-# Configure logging
-logger = logging.getLogger()
+# zlib is imported inside the compression helpers that use it so
+# handlers that only validate and build responses skip it on cold start
+
+# Configure logging; a module logger keeps the layer from changing the
+# level of the Lambda runtime's root logger
+logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Bound once so the hashing helpers skip the module attribute lookup
+_sha256 = hashlib.sha256
+
+# Validator patterns, compiled once per container instead of per call
+_DOI_RE = re.compile(r'^10\.\d{4,9}/[-._;()/:A-Z0-9]+$', re.IGNORECASE)
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_URL_RE = re.compile(r'^https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/\w\.-]*$')
+_HASH_RE = re.compile(r'^[0-9a-fA-F]{64}$')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_ALPHANUM = string.ascii_letters + string.digits
+_DOI_EXTRACT_RE = re.compile(r'\b(10\.\d{4,9}/[-._;()/:A-Z0-9]+)\b', re.IGNORECASE)
+# One alternation covering every PubMed URL shape, so the URL is scanned once
+_PMID_URL_RE = re.compile(
+    r'(?:pubmed\.ncbi\.nlm\.nih\.gov/(?:pubmed/|articl/)?|ncbi\.nlm\.nih\.gov/pubmed/|pmid=)(\d+)',
+    re.IGNORECASE
+)
+
+# BatchWriteItem accepts at most 25 puts per request
+BATCH_WRITE_SIZE = 25
+BATCH_WRITE_WORKERS = 8
+BATCH_WRITE_MAX_ATTEMPTS = 5
+
+# DynamoDB resources per region, shared by every DynamoDBClient in the container
+_RESOURCE_CACHE: Dict[str, Any] = {}
+
+def _get_resource(region: str) -> Any:
+    """Return the cached DynamoDB resource for a region, creating it on first use"""
+    resource = _RESOURCE_CACHE.get(region)
+    if resource is None:
+        # Imported here so functions that only use the validators and hash
+        # helpers don't pay boto3's import cost on cold start
+        import boto3
+        from botocore.config import Config
+        resource = _RESOURCE_CACHE[region] = boto3.resource(
+            'dynamodb',
+            region_name=region,
+            config=Config(max_pool_connections=64, tcp_keepalive=True)
+        )
+    return resource
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache whose entries expire after a fixed time
+    
+    Kept at module scope in a handler so warm invocations of one container
+    share it; when full, the oldest entry is evicted.
+    """
+    
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any) -> Any:
+        """Return the value cached for key, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+    
+    def put(self, key: Any, value: Any) -> None:
+        """Cache value under key, evicting the oldest entry when full"""
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_size:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+    
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
 class DynamoDBClient:
     """Wrapper for DynamoDB operations"""
     
     def __init__(self, table_name: str, region: str = 'us-east-1'):
-        self.dynamodb = boto3.resource('dynamodb', region_name=region)
+        self.dynamodb = _get_resource(region)
         self.table = self.dynamodb.Table(table_name)
         self.table_name = table_name
     
@@ -38,7 +126,7 @@ class DynamoDBClient:
             response = self.table.get_item(Key=key)
             return response.get('Item')
         except ClientError as e:
-            logger.error(f"Error getting item from {self.table_name}: {e}")
+            logger.error("Error getting item from %s: %s", self.table_name, e)
             return None
     
     def put_item(self, item: Dict[str, Any]) -> bool:
@@ -47,7 +135,7 @@ class DynamoDBClient:
             self.table.put_item(Item=item)
             return True
         except ClientError as e:
-            logger.error(f"Error putting item in {self.table_name}: {e}")
+            logger.error("Error putting item in %s: %s", self.table_name, e)
             return False
     
     def update_item(self, key: Dict[str, Any], update_expr: str, expr_attrs: Dict[str, Any]) -> bool:
@@ -60,7 +148,7 @@ class DynamoDBClient:
             )
             return True
         except ClientError as e:
-            logger.error(f"Error updating item in {self.table_name}: {e}")
+            logger.error("Error updating item in %s: %s", self.table_name, e)
             return False
     
     def delete_item(self, key: Dict[str, Any]) -> bool:
@@ -69,7 +157,7 @@ class DynamoDBClient:
             self.table.delete_item(Key=key)
             return True
         except ClientError as e:
-            logger.error(f"Error deleting item from {self.table_name}: {e}")
+            logger.error("Error deleting item from %s: %s", self.table_name, e)
             return False
     
     def query(self, index_name: str, key_condition: str, expr_attrs: Dict[str, Any], 
@@ -85,7 +173,7 @@ class DynamoDBClient:
             )
             return response.get('Items', [])
         except ClientError as e:
-            logger.error(f"Error querying table {self.table_name}: {e}")
+            logger.error("Error querying table %s: %s", self.table_name, e)
             return []
     
     def scan(self, filter_expr: Optional[str] = None, expr_attrs: Optional[Dict[str, Any]] = None,
@@ -100,18 +188,32 @@ class DynamoDBClient:
             response = self.table.scan(**params)
             return response.get('Items', [])
         except ClientError as e:
-            logger.error(f"Error scanning table {self.table_name}: {e}")
+            logger.error("Error scanning table %s: %s", self.table_name, e)
             return []
     
+    def _write_chunk(self, chunk: List[Dict[str, Any]]) -> bool:
+        """Write up to 25 items with one BatchWriteItem, re-sending unprocessed items"""
+        request_items = {self.table_name: [{'PutRequest': {'Item': item}} for item in chunk]}
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            response = self.dynamodb.meta.client.batch_write_item(RequestItems=request_items)
+            request_items = response.get('UnprocessedItems')
+            if not request_items:
+                return True
+            time.sleep(calculate_backoff(attempt, base_delay=0.05, max_delay=2.0))
+        logger.error("Unprocessed items left after batch writing to %s", self.table_name)
+        return False
+    
     def batch_write(self, items: List[Dict[str, Any]]) -> bool:
-        """Batch write items"""
+        """Batch write items, sending the 25-item chunks in parallel"""
         try:
-            with self.table.batch_writer() as batch:
-                for item in items:
-                    batch.put_item(Item=item)
-            return True
+            chunk_count = -(-len(items) // BATCH_WRITE_SIZE)
+            chunks = ichunk(items, BATCH_WRITE_SIZE)
+            if chunk_count <= 1:
+                return all(map(self._write_chunk, chunks))
+            with ThreadPoolExecutor(max_workers=min(BATCH_WRITE_WORKERS, chunk_count)) as executor:
+                return all(list(executor.map(self._write_chunk, chunks)))
         except ClientError as e:
-            logger.error(f"Error batch writing to {self.table_name}: {e}")
+            logger.error("Error batch writing to %s: %s", self.table_name, e)
             return False
     
     def increment_counter(self, key: Dict[str, Any], counter_field: str, increment: int = 1) -> Optional[int]:
@@ -125,16 +227,30 @@ class DynamoDBClient:
             )
             return response.get('Attributes', {}).get(counter_field)
         except ClientError as e:
-            logger.error(f"Error incrementing counter in {self.table_name}: {e}")
+            logger.error("Error incrementing counter in %s: %s", self.table_name, e)
             return None
 
+_HMAC_ALGORITHMS = {
+    'sha256': hashlib.sha256,
+    'sha512': hashlib.sha512,
+    'sha1': hashlib.sha1,
+    'md5': hashlib.md5
+}
+
 class HashGenerator:
     """Generate and verify hashes"""
     
     @staticmethod
-    def generate_sha256(data: str) -> str:
+    def generate_sha256(data: Union[str, bytes]) -> str:
         """Generate SHA-256 hash"""
-        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return _sha256(data).hexdigest()
+    
+    @staticmethod
+    def generate_sha256_bytes(data: bytes) -> str:
+        """Generate SHA-256 hash of data that is already bytes"""
+        return _sha256(data).hexdigest()
     
     @staticmethod
     def generate_sha512(data: str) -> str:
@@ -149,50 +265,63 @@ class HashGenerator:
     @staticmethod
     def generate_hmac(data: str, key: str, algorithm: str = 'sha256') -> str:
         """Generate HMAC with specified algorithm"""
-        algorithms = {
-            'sha256': hashlib.sha256,
-            'sha512': hashlib.sha512,
-            'sha1': hashlib.sha1,
-            'md5': hashlib.md5
-        }
-        hash_func = algorithms.get(algorithm, hashlib.sha256)
+        return HashGenerator.generate_hmac_bytes(data, key, algorithm).hex()
+    
+    @staticmethod
+    def generate_hmac_bytes(data: str, key: str, algorithm: str = 'sha256') -> bytes:
+        """Generate raw HMAC digest with specified algorithm"""
+        hash_func = _HMAC_ALGORITHMS.get(algorithm, hashlib.sha256)
         
         return hmac.new(
             key.encode('utf-8'),
             data.encode('utf-8'),
             hash_func
-        ).hexdigest()
+        ).digest()
     
     @staticmethod
     def verify_hash(data: str, expected_hash: str, key: Optional[str] = None, 
                     algorithm: str = 'sha256') -> bool:
         """Verify hash"""
+        try:
+            expected = bytes.fromhex(expected_hash)
+        except ValueError:
+            return False
+        
         if key:
-            computed = HashGenerator.generate_hmac(data, key, algorithm)
+            computed = HashGenerator.generate_hmac_bytes(data, key, algorithm)
         else:
-            computed = HashGenerator.generate_sha256(data)
+            computed = _sha256(data.encode('utf-8')).digest()
         
-        # Constant-time comparison
-        return hmac.compare_digest(computed, expected_hash)
+        # Constant-time comparison over the raw digests
+        return hmac.compare_digest(computed, expected)
     
     @staticmethod
     def generate_hash_from_dict(data: Dict[str, Any], exclude_keys: List[str] = None) -> str:
         """Generate hash from dictionary"""
-        if exclude_keys is None:
-            exclude_keys = []
-        
-        # Create sorted copy excluding specified keys
-        filtered = {k: v for k, v in data.items() if k not in exclude_keys}
+        # Create copy excluding specified keys; nothing to filter without exclusions
+        if exclude_keys:
+            excluded = set(exclude_keys)
+            filtered = {k: v for k, v in data.items() if k not in excluded}
+        else:
+            filtered = data
         
-        # Convert to canonical JSON string
+        # Convert to canonical JSON string. Kept on the stdlib encoder: its
+        # separators and escaping define the canonical form, so existing
+        # hashes must keep matching
         canonical = json.dumps(filtered, sort_keys=True, default=str)
         
-        return HashGenerator.generate_sha256(canonical)
+        return _sha256(canonical.encode('utf-8')).hexdigest()
     
     @staticmethod
     def generate_hash_from_file(file_content: bytes) -> str:
         """Generate hash from file content"""
-        return hashlib.sha256(file_content).hexdigest()
+        return _sha256(file_content).hexdigest()
+
+def _xor_text(text: str, key: str) -> str:
+    """XOR each code point of text with the repeating key, looping in C via map"""
+    if text and not key:
+        raise ValueError("key must not be empty")
+    return ''.join(map(chr, map(xor, map(ord, text), cycle(map(ord, key)))))
 
 class CryptoUtils:
     """Cryptographic utilities"""
@@ -201,14 +330,9 @@ class CryptoUtils:
     def encrypt_data(data: str, key: str) -> str:
         """Simple XOR encryption (not for production)"""
         # This is a simple implementation - use proper encryption in production
-        encrypted = []
-        for i, char in enumerate(data):
-            key_char = key[i % len(key)]
-            encrypted_char = chr(ord(char) ^ ord(key_char))
-            encrypted.append(encrypted_char)
+        combined = _xor_text(data, key)
         
         # Encode to base64 for safe transmission
-        combined = ''.join(encrypted)
         return base64.b64encode(combined.encode()).decode()
     
     @staticmethod
@@ -217,24 +341,23 @@ class CryptoUtils:
         # Decode from base64
         decoded = base64.b64decode(encrypted_data).decode()
         
-        decrypted = []
-        for i, char in enumerate(decoded):
-            key_char = key[i % len(key)]
-            decrypted_char = chr(ord(char) ^ ord(key_char))
-            decrypted.append(decrypted_char)
-        
-        return ''.join(decrypted)
+        return _xor_text(decoded, key)
     
     @staticmethod
-    def compress_data(data: str) -> str:
-        """Compress string data"""
-        compressed = zlib.compress(data.encode('utf-8'))
-        return base64.b64encode(compressed).decode()
+    def compress_data(data: str, level: int = 1, as_base64: bool = True) -> Union[str, bytes]:
+        """Compress string data; as_base64=False returns raw bytes for Binary attributes"""
+        import zlib
+        compressed = zlib.compress(data.encode('utf-8'), level)
+        return base64.b64encode(compressed).decode() if as_base64 else compressed
     
     @staticmethod
-    def decompress_data(compressed_data: str) -> str:
-        """Decompress string data"""
-        compressed = base64.b64decode(compressed_data)
+    def decompress_data(compressed_data: Union[str, bytes]) -> str:
+        """Decompress data from compress_data, base64 text or raw bytes"""
+        import zlib
+        if isinstance(compressed_data, str):
+            compressed = base64.b64decode(compressed_data)
+        else:
+            compressed = compressed_data
         decompressed = zlib.decompress(compressed)
         return decompressed.decode('utf-8')
     
@@ -259,7 +382,7 @@ class ResponseBuilder:
         body = {
             'success': True,
             'message': message,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': current_timestamp()
         }
         if data is not None:
             body['data'] = data
@@ -273,7 +396,7 @@ class ResponseBuilder:
         body = {
             'success': False,
             'message': message,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': current_timestamp()
         }
         if error_code:
             body['error_code'] = error_code
@@ -307,28 +430,37 @@ class ResponseBuilder:
         body = {
             'success': False,
             'message': "Internal server error",
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': current_timestamp()
         }
         if error_id:
             body['error_id'] = error_id
         
         return create_response(500, body)
 
+# Shared by every response; copy before adding per-response headers
+_CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Credentials': 'true',
+    'Access-Control-Max-Age': '600'
+}
+
 def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
     """Create standardized API response"""
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Credentials': 'true',
-            'Access-Control-Max-Age': '600'
-        },
-        'body': json.dumps(body, default=json_serializer)
+        'headers': _CORS_HEADERS,
+        'body': _json_dumps(body)
     }
 
+def _json_dumps(obj: Any) -> str:
+    """Serialize a response body, using orjson when the layer ships it"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_serializer, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=json_serializer)
+
 def json_serializer(obj: Any) -> str:
     """JSON serializer for objects not serializable by default"""
     if isinstance(obj, datetime):
@@ -351,7 +483,7 @@ def parse_request_body(event: Dict[str, Any]) -> Dict[str, Any]:
             return body
         return {}
     except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {e}")
+        logger.error("JSON decode error: %s", e)
         return {}
 
 def get_path_parameter(event: Dict[str, Any], param: str) -> Optional[str]:
@@ -364,41 +496,55 @@ def get_query_parameter(event: Dict[str, Any], param: str, default: Any = None)
     query_params = event.get('queryStringParameters') or {}
     return query_params.get(param, default)
 
+def _normalize_headers(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Lower-cased copy of the event headers, built once and cached on the event"""
+    headers = event.get('_lc_headers')
+    if headers is None:
+        headers = event['_lc_headers'] = {
+            k.lower(): v for k, v in (event.get('headers') or {}).items()
+        }
+    return headers
+
 def get_header(event: Dict[str, Any], header: str) -> Optional[str]:
     """Get header from event"""
-    headers = event.get('headers') or {}
     # Case-insensitive lookup
-    for key, value in headers.items():
-        if key.lower() == header.lower():
-            return value
-    return None
+    return _normalize_headers(event).get(header.lower())
 
 def validate_pmid(pmid: str) -> bool:
     """Validate PubMed ID format"""
-    return bool(pmid and pmid.isdigit() and 1 <= len(pmid) <= 20)
+    # Length check first so oversized input never gets scanned by isdigit
+    if not pmid or len(pmid) > 20:
+        return False
+    return pmid.isdigit()
 
 def validate_doi(doi: str) -> bool:
     """Validate DOI format"""
-    pattern = r'^10\.\d{4,9}/[-._;()/:A-Z0-9]+$'
-    return bool(re.match(pattern, doi, re.IGNORECASE))
+    return bool(_DOI_RE.match(doi))
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
 
 def validate_url(url: str) -> bool:
     """Validate URL format"""
-    pattern = r'^https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/\w\.-]*$'
-    return bool(re.match(pattern, url))
+    return bool(_URL_RE.match(url))
 
 def validate_hash(hash_value: str) -> bool:
     """Validate hash format (hex string)"""
-    return bool(re.match(r'^[0-9a-fA-F]{64}$', hash_value))
+    return bool(_HASH_RE.match(hash_value))
+
+# (epoch second, formatted timestamp) for the last second current_timestamp saw
+_timestamp_cache = (0, '')
 
 def current_timestamp() -> str:
-    """Get current UTC timestamp in ISO format"""
-    return datetime.utcnow().isoformat()
+    """Get current UTC timestamp in ISO format, at second resolution"""
+    global _timestamp_cache
+    now = int(time.time())
+    cached_at, formatted = _timestamp_cache
+    if cached_at != now:
+        formatted = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now))
+        _timestamp_cache = (now, formatted)
+    return formatted
 
 def current_epoch() -> int:
     """Get current epoch timestamp"""
@@ -406,15 +552,14 @@ def current_epoch() -> int:
 
 def generate_id(prefix: str = '', length: int = 16) -> str:
     """Generate unique ID"""
-    unique_id = str(uuid.uuid4()).replace('-', '')
-    if length:
-        unique_id = unique_id[:length]
+    # A falsy length means the full 32 hex characters
+    length = length or 32
+    unique_id = secrets.token_hex((length + 1) // 2)[:length]
     return f"{prefix}{unique_id}" if prefix else unique_id
 
 def generate_short_id(length: int = 8) -> str:
     """Generate short alphanumeric ID"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(length))
+    return ''.join(random.choices(_ALPHANUM, k=length))
 
 def safe_json_loads(data: str, default: Any = None) -> Any:
     """Safely load JSON string"""
@@ -427,26 +572,19 @@ def chunk_list(lst: List[Any], chunk_size: int) -> List[List[Any]]:
     """Split list into chunks"""
     return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
 
+def ichunk(lst: List[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Yield chunks of a list one at a time"""
+    for i in range(0, len(lst), chunk_size):
+        yield lst[i:i + chunk_size]
+
 def extract_pmid_from_url(url: str) -> Optional[str]:
     """Extract PMID from PubMed URL"""
-    patterns = [
-        r'pubmed\.ncbi\.nlm\.nih\.gov/(\d+)',
-        r'pubmed\.ncbi\.nlm\.nih\.gov/pubmed/(\d+)',
-        r'pubmed\.ncbi\.nlm\.nih\.gov/articl/(\d+)',
-        r'ncbi\.nlm\.nih\.gov/pubmed/(\d+)',
-        r'pmid=(\d+)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url, re.IGNORECASE)
-        if match:
-            return match.group(1)
-    return None
+    match = _PMID_URL_RE.search(url)
+    return match.group(1) if match else None
 
 def extract_doi_from_text(text: str) -> Optional[str]:
     """Extract DOI from text"""
-    pattern = r'\b(10\.\d{4,9}/[-._;()/:A-Z0-9]+)\b'
-    match = re.search(pattern, text, re.IGNORECASE)
+    match = _DOI_EXTRACT_RE.search(text)
     return match.group(1) if match else None
 
 def truncate_text(text: str, max_length: int = 200, suffix: str = '...') -> str:
@@ -457,20 +595,29 @@ def truncate_text(text: str, max_length: int = 200, suffix: str = '...') -> str:
 
 def sanitize_input(text: str) -> str:
     """Sanitize user input"""
-    # Remove any non-printable characters
-    text = ''.join(char for char in text if char.isprintable())
+    # Remove any non-printable characters; the whole-string check runs in C and
+    # the common all-printable input skips the per-character filter entirely
+    if not text.isprintable():
+        text = ''.join(filter(str.isprintable, text))
     # Remove any HTML tags (simple version)
-    text = re.sub(r'<[^>]+>', '', text)
+    text = _HTML_TAG_RE.sub('', text)
     return text.strip()
 
+# Masks up to this length are sliced from one shared string
+_STARS = '*' * 1024
+
+def _mask(length: int) -> str:
+    """Return length asterisks"""
+    return _STARS[:length] if length <= len(_STARS) else '*' * length
+
 def mask_sensitive_data(data: str, visible_chars: int = 4) -> str:
     """Mask sensitive data (e.g., API keys)"""
     if len(data) <= visible_chars * 2:
-        return '*' * len(data)
+        return _mask(len(data))
     
     start = data[:visible_chars]
     end = data[-visible_chars:]
-    masked = '*' * (len(data) - visible_chars * 2)
+    masked = _mask(len(data) - visible_chars * 2)
     return f"{start}{masked}{end}"
 
 def calculate_backoff(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0) -> float:
@@ -491,7 +638,7 @@ def retry_with_backoff(func, max_retries: int = 3, base_delay: float = 1.0):
                 last_exception = e
                 if attempt < max_retries - 1:
                     delay = calculate_backoff(attempt, base_delay)
-                    logger.warning(f"Attempt {attempt + 1} failed, retrying in {delay:.2f}s: {e}")
+                    logger.warning("Attempt %s failed, retrying in %.2fs: %s", attempt + 1, delay, e)
                     time.sleep(delay)
         raise last_exception
     return wrapper
@@ -531,6 +678,8 @@ def create_error_id() -> str:
 def log_error_with_id(error: Exception, context: Dict[str, Any] = None) -> str:
     """Log error with unique ID and return it"""
     error_id = create_error_id()
+    if not logger.isEnabledFor(logging.ERROR):
+        return error_id
     error_data = {
         'error_id': error_id,
         'error_type': type(error).__name__,
@@ -540,8 +689,5 @@ def log_error_with_id(error: Exception, context: Dict[str, Any] = None) -> str:
     if context:
         error_data['context'] = context
     
-    logger.error(f"Error {error_id}: {error_data}")
+    logger.error("Error %s: %s", error_id, error_data)
     return error_id
-
-# Import secrets for token generation
-import secrets
\ No newline at end of file
@@ -4,53 +4,119 @@ Complete version with all fixtures
 """
 
 import pytest
-import boto3
+import copy
+import hashlib
 import json
 from datetime import datetime, timedelta
-from moto import mock_dynamodb, mock_bedrock, mock_s3
 import os
 import sys
+from types import MappingProxyType, SimpleNamespace
 from typing import Dict, Any, Generator
 import random
-import string
+import secrets
 
 # Add the layers to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../layers/common/python'))
 
-@pytest.fixture(autouse=True)
+_TEST_HASH = hashlib.sha256(b'test_data').hexdigest()
+
+_AWS_DEFAULTS = MappingProxyType({
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_SECURITY_TOKEN': 'testing',
+    'AWS_SESSION_TOKEN': 'testing',
+    'AWS_DEFAULT_REGION': 'us-east-1'
+})
+
+@pytest.fixture(autouse=True, scope="session")
 def aws_credentials():
-    """Mocked AWS Credentials for moto"""
-    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
-    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
-    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
-    os.environ['AWS_SESSION_TOKEN'] = 'testing'
-    os.environ['AWS_DEFAULT_REGION'] = 'us-east-1'
+    """Mocked AWS Credentials for moto, set once for the session"""
+    for key, value in _AWS_DEFAULTS.items():
+        # pytest-env usually sets these already; skip the redundant putenv
+        if os.environ.get(key) != value:
+            os.environ[key] = value
 
-@pytest.fixture
-def dynamodb_client(aws_credentials):
-    """Create mock DynamoDB client"""
-    with mock_dynamodb():
-        yield boto3.client('dynamodb', region_name='us-east-1')
+# boto3, botocore and moto are imported inside the fixtures that need them, so
+# collecting or running tests that never touch AWS does not pay for them
 
-@pytest.fixture
-def dynamodb_resource(aws_credentials):
+@pytest.fixture(scope="session")
+def boto3_session():
+    """One boto3 session for every AWS fixture, so service models load once"""
+    # moto registers its botocore handler on import, and sessions created
+    # before that never route calls to the mocks
+    try:
+        import moto  # noqa: F401
+    except ImportError:
+        pass
+    import boto3
+    return boto3.session.Session(region_name='us-east-1')
+
+@pytest.fixture(scope="session")
+def dynamodb_mock(aws_credentials):
+    """Keep one moto DynamoDB backend alive for the whole session"""
+    moto = pytest.importorskip('moto')
+    with moto.mock_dynamodb():
+        yield
+
+@pytest.fixture(scope="session")
+def dynamodb_resource(dynamodb_mock, boto3_session):
     """Create mock DynamoDB resource"""
-    with mock_dynamodb():
-        yield boto3.resource('dynamodb', region_name='us-east-1')
+    return boto3_session.resource('dynamodb')
 
-@pytest.fixture
-def s3_client(aws_credentials):
+@pytest.fixture(scope="session")
+def dynamodb_client(dynamodb_resource):
+    """Create mock DynamoDB client"""
+    # The resource already carries a low-level client for the same mock
+    return dynamodb_resource.meta.client
+
+@pytest.fixture(scope="session")
+def s3_client(aws_credentials, boto3_session):
     """Create mock S3 client"""
-    with mock_s3():
-        yield boto3.client('s3', region_name='us-east-1')
+    moto = pytest.importorskip('moto')
+    with moto.mock_s3():
+        yield boto3_session.client('s3')
 
-@pytest.fixture
-def bedrock_client(aws_credentials):
-    """Create mock Bedrock client"""
-    with mock_bedrock():
-        yield boto3.client('bedrock-runtime', region_name='us-east-1')
+@pytest.fixture(scope="session")
+def _bedrock_runtime_client(aws_credentials, boto3_session):
+    """Bedrock runtime client shared by the stubbed fixture"""
+    return boto3_session.client('bedrock-runtime')
 
 @pytest.fixture
+def bedrock_client(_bedrock_runtime_client):
+    """Create stubbed Bedrock client; yields the client and its Stubber"""
+    from botocore.stub import Stubber
+    stubber = Stubber(_bedrock_runtime_client)
+    stubber.activate()
+    yield _bedrock_runtime_client, stubber
+    stubber.deactivate()
+
+def _clear_table(table) -> None:
+    """Delete every item from a table, keeping the table itself"""
+    key_names = [key['AttributeName'] for key in table.key_schema]
+    names = {f'#k{i}': name for i, name in enumerate(key_names)}
+    scan_kwargs = {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+    with table.batch_writer() as batch:
+        while True:
+            response = table.scan(**scan_kwargs)
+            for item in response['Items']:
+                batch.delete_item(Key={name: item[name] for name in key_names})
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+_TABLE_FIXTURES = ('papers_table', 'summaries_table', 'verifications_table')
+
+@pytest.fixture(autouse=True)
+def reset_tables(request):
+    """Start each test that uses a session-scoped table with it empty"""
+    for name in _TABLE_FIXTURES:
+        if name in request.fixturenames:
+            _clear_table(request.getfixturevalue(name))
+
+@pytest.fixture(scope="session")
 def papers_table(dynamodb_resource):
     """Create mock papers table"""
     table_name = 'medhash-papers-test'
@@ -66,12 +132,10 @@ def papers_table(dynamodb_resource):
         BillingMode='PAY_PER_REQUEST'
     )
     
-    # Wait for table to be active
-    table.meta.client.get_waiter('table_exists').wait(TableName=table_name)
-    
+    # moto creates tables synchronously, so there is no table_exists waiter
     return table
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def summaries_table(dynamodb_resource):
     """Create mock summaries table"""
     table_name = 'medhash-summaries-test'
@@ -97,10 +161,9 @@ def summaries_table(dynamodb_resource):
         BillingMode='PAY_PER_REQUEST'
     )
     
-    table.meta.client.get_waiter('table_exists').wait(TableName=table_name)
     return table
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def verifications_table(dynamodb_resource):
     """Create mock verifications table"""
     table_name = 'medhash-verifications-test'
@@ -126,12 +189,11 @@ def verifications_table(dynamodb_resource):
         BillingMode='PAY_PER_REQUEST'
     )
     
-    table.meta.client.get_waiter('table_exists').wait(TableName=table_name)
     return table
 
-@pytest.fixture
-def sample_paper() -> Dict[str, Any]:
-    """Sample paper data for tests"""
+@pytest.fixture(scope="session")
+def _sample_paper_data() -> Dict[str, Any]:
+    """Sample paper data for tests, built once per session"""
     return {
         'pmid': '12345678',
         'title': 'A Randomized Controlled Trial of Medical Intervention',
@@ -147,8 +209,15 @@ def sample_paper() -> Dict[str, Any]:
     }
 
 @pytest.fixture
-def sample_summary() -> Dict[str, Any]:
-    """Sample summary data for tests"""
+def sample_paper(_sample_paper_data) -> Dict[str, Any]:
+    """Sample paper data for tests"""
+    # Session-built data is deep copied so a test mutating it cannot leak
+    # into the next one; the other sample fixtures below follow the same pattern
+    return copy.deepcopy(_sample_paper_data)
+
+@pytest.fixture(scope="session")
+def _sample_summary_data() -> Dict[str, Any]:
+    """Sample summary data for tests, built once per session"""
     return {
         'summaryId': 'sum_1234567890abcdef',
         'pmid': '12345678',
@@ -160,19 +229,23 @@ def sample_summary() -> Dict[str, Any]:
     }
 
 @pytest.fixture
-def sample_verification() -> Dict[str, Any]:
-    """Sample verification data for tests"""
-    import hashlib
-    hash_value = hashlib.sha256(b'test_data').hexdigest()
+def sample_summary(_sample_summary_data) -> Dict[str, Any]:
+    """Sample summary data for tests"""
+    return copy.deepcopy(_sample_summary_data)
+
+@pytest.fixture(scope="session")
+def _sample_verification_data() -> Dict[str, Any]:
+    """Sample verification data for tests, built once per session"""
+    now = datetime.utcnow().isoformat()
     
     return {
-        'hash': hash_value,
+        'hash': _TEST_HASH,
         'pmid': '12345678',
         'summaryId': 'sum_1234567890abcdef',
         'paper_title': 'Test Paper',
-        'created_at': datetime.utcnow().isoformat(),
+        'created_at': now,
         'verification_count': 5,
-        'last_verified': datetime.utcnow().isoformat(),
+        'last_verified': now,
         'metadata': {
             'has_secret': False,
             'store_on_chain': True
@@ -180,70 +253,79 @@ def sample_verification() -> Dict[str, Any]:
     }
 
 @pytest.fixture
-def api_gateway_event() -> Dict[str, Any]:
-    """Sample API Gateway event"""
-    return {
-        'httpMethod': 'POST',
-        'path': '/test',
-        'headers': {
-            'Content-Type': 'application/json',
-            'Origin': 'http://localhost:3000'
-        },
-        'queryStringParameters': {},
-        'pathParameters': {},
-        'body': json.dumps({'test': 'data'}),
-        'requestContext': {
-            'identity': {
-                'sourceIp': '192.168.1.1'
-            }
+def sample_verification(_sample_verification_data) -> Dict[str, Any]:
+    """Sample verification data for tests"""
+    return copy.deepcopy(_sample_verification_data)
+
+_BASE_BODY = json.dumps({'test': 'data'})
+
+_BASE_EVENT = {
+    'httpMethod': 'POST',
+    'path': '/test',
+    'headers': {
+        'Content-Type': 'application/json',
+        'Origin': 'http://localhost:3000'
+    },
+    'queryStringParameters': {},
+    'pathParameters': {},
+    'body': _BASE_BODY,
+    'requestContext': {
+        'identity': {
+            'sourceIp': '192.168.1.1'
         }
     }
+}
+
+@pytest.fixture
+def api_gateway_event() -> Dict[str, Any]:
+    """Sample API Gateway event"""
+    return copy.deepcopy(_BASE_EVENT)
 
 @pytest.fixture
-def api_gateway_event_with_path(api_gateway_event) -> Dict[str, Any]:
+def api_gateway_event_with_path() -> Dict[str, Any]:
     """API Gateway event with path parameters"""
-    event = api_gateway_event.copy()
+    # Deep copy: a shallow copy would share the nested headers and context
+    event = copy.deepcopy(_BASE_EVENT)
     event['pathParameters'] = {'id': 'test123'}
     return event
 
 @pytest.fixture
-def api_gateway_event_with_query(api_gateway_event) -> Dict[str, Any]:
+def api_gateway_event_with_query() -> Dict[str, Any]:
     """API Gateway event with query parameters"""
-    event = api_gateway_event.copy()
+    event = copy.deepcopy(_BASE_EVENT)
     event['queryStringParameters'] = {'page': '1', 'limit': '10'}
     return event
 
-@pytest.fixture
+# Stateless, so one instance serves the whole session
+_LAMBDA_CONTEXT = SimpleNamespace(
+    function_name='test-function',
+    function_version='$LATEST',
+    invoked_function_arn='arn:aws:lambda:us-east-1:123456789012:function:test-function',
+    memory_limit_in_mb=512,
+    aws_request_id='test-request-id',
+    log_group_name='/aws/lambda/test-function',
+    log_stream_name='2024/01/01/[$LATEST]test-stream',
+    get_remaining_time_in_millis=lambda: 30000
+)
+
+@pytest.fixture(scope="session")
 def lambda_context():
     """Mock Lambda context"""
-    class MockContext:
-        def __init__(self):
-            self.function_name = 'test-function'
-            self.function_version = '$LATEST'
-            self.invoked_function_arn = 'arn:aws:lambda:us-east-1:123456789012:function:test-function'
-            self.memory_limit_in_mb = 512
-            self.aws_request_id = 'test-request-id'
-            self.log_group_name = '/aws/lambda/test-function'
-            self.log_stream_name = '2024/01/01/[$LATEST]test-stream'
-            
-        def get_remaining_time_in_millis(self):
-            return 30000
-    
-    return MockContext()
+    return _LAMBDA_CONTEXT
 
 @pytest.fixture
 def random_pmid() -> str:
     """Generate random PMID"""
-    return ''.join(random.choices(string.digits, k=8))
+    return str(random.randint(10_000_000, 99_999_999))
 
 @pytest.fixture
 def random_hash() -> str:
     """Generate random hash"""
-    return ''.join(random.choices(string.hexdigits, k=64)).lower()
+    return secrets.token_hex(32)
 
-@pytest.fixture
-def sample_pubmed_response() -> Dict[str, Any]:
-    """Sample PubMed API response"""
+@pytest.fixture(scope="session")
+def _sample_pubmed_response_data() -> Dict[str, Any]:
+    """Sample PubMed API response, built once per session"""
     return {
         'result': {
             '12345678': {
@@ -261,6 +343,11 @@ def sample_pubmed_response() -> Dict[str, Any]:
     }
 
 @pytest.fixture
+def sample_pubmed_response(_sample_pubmed_response_data) -> Dict[str, Any]:
+    """Sample PubMed API response"""
+    return copy.deepcopy(_sample_pubmed_response_data)
+
+@pytest.fixture(scope="session")
 def sample_pubmed_abstract_xml() -> str:
     """Sample PubMed abstract XML"""
     return '''<?xml version="1.0"?>
@@ -280,9 +367,9 @@ def sample_pubmed_abstract_xml() -> str:
   </PubmedArticle>
 </PubmedArticleSet>'''
 
-@pytest.fixture
-def sample_bedrock_response() -> Dict[str, Any]:
-    """Sample Bedrock API response"""
+@pytest.fixture(scope="session")
+def _sample_bedrock_response_data() -> Dict[str, Any]:
+    """Sample Bedrock API response, built once per session"""
     return {
         'output': {
             'message': {
@@ -291,4 +378,9 @@ def sample_bedrock_response() -> Dict[str, Any]:
                 ]
             }
         }
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture
+def sample_bedrock_response(_sample_bedrock_response_data) -> Dict[str, Any]:
+    """Sample Bedrock API response"""
+    return copy.deepcopy(_sample_bedrock_response_data)
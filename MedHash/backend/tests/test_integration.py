@@ -4,26 +4,66 @@ Tests end-to-end workflows across multiple functions
 """
 
 import pytest
+import importlib.util
 import json
 import sys
 import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, DEFAULT
 from datetime import datetime
 
-# Add function paths to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../functions/fetch-pubmed'))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../functions/generate-summary'))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../functions/create-hash'))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../functions/verify-hash'))
+FUNCTIONS_DIR = os.path.join(os.path.dirname(__file__), '../functions')
 
-import app as fetch_app
-import app as summary_app
-import app as hash_app
-import app as verify_app
+def _load(name: str, function: str):
+    """Import a function's app.py under its own module name"""
+    # Every function ships an app.py, so a plain `import app` would hand back
+    # the first one for all four aliases
+    spec = importlib.util.spec_from_file_location(name, os.path.join(FUNCTIONS_DIR, function, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # lets patch('fetch_app....') resolve the module
+    spec.loader.exec_module(module)
+    return module
 
+# moto hooks botocore when it is imported, and only clients created after that
+# are routed to its mocks, so load it before the function modules build theirs
+pytest.importorskip('moto')
+
+fetch_app = _load('fetch_app', 'fetch-pubmed')
+summary_app = _load('summary_app', 'generate-summary')
+hash_app = _load('hash_app', 'create-hash')
+verify_app = _load('verify_app', 'verify-hash')
+
+# Request events whose body is just a PMID, serialised once for the module.
+# The handlers only read their events, so tests can share them
+_PMID_EVENTS = {
+    pmid: {'body': json.dumps({'pmid': pmid})}
+    for pmid in ('12345678', '99999999', 'invalid', '11111111', '22222222', '33333333', '44444444')
+}
+
+@pytest.fixture(scope="module")
+def workflow_state():
+    """Values handed from one workflow step test to the next"""
+    return {}
+
+def _from_earlier_step(workflow_state, key: str):
+    """Value recorded by an earlier workflow step; skip when that step did not run or failed"""
+    if key not in workflow_state:
+        pytest.skip(f"earlier workflow step did not record {key}")
+    return workflow_state[key]
+
+# Keep the class on one xdist worker so it shares that worker's session-scoped moto mocks
+@pytest.mark.xdist_group(name="moto")
 class TestMedHashIntegration:
     """Integration tests for complete MedHash workflow"""
     
+    @pytest.fixture(autouse=True)
+    def clear_container_caches(self, dynamodb_mock):
+        """Forget papers and records cached by earlier invocations"""
+        # dynamodb_mock keeps any unpatched table call inside moto
+        fetch_app._paper_cache.clear()
+        summary_app._paper_cache.clear()
+        verify_app._record_cache.clear()
+        yield
+    
     @pytest.fixture
     def setup_tables(self, papers_table, summaries_table, verifications_table):
         """Setup all tables for testing"""
@@ -33,15 +73,17 @@ class TestMedHashIntegration:
             'verifications': verifications_table
         }
     
+    # === Complete workflow, fetch -> summary -> hash -> verify ===
+    # One test per step, run in definition order. Each step records what the
+    # next one needs in workflow_state; a step whose input is missing skips
+    
     @patch('fetch_app.table.get_item')
     @patch('fetch_app.PubMedFetcher.fetch_metadata')
     @patch('fetch_app.PubMedFetcher.fetch_abstract')
     @patch('fetch_app.table.put_item')
-    def test_complete_workflow(self, mock_put, mock_abstract, mock_metadata, 
-                               mock_get, setup_tables, sample_paper):
-        """Test complete workflow from fetch to verify"""
-        
-        # === STEP 1: Fetch Paper ===
+    def test_01_fetch(self, mock_put, mock_abstract, mock_metadata,
+                      mock_get, workflow_state, setup_tables, sample_paper):
+        """Workflow step 1: fetch the paper"""
         mock_get.return_value = {}  # No cached item
         mock_metadata.return_value = {
             'title': sample_paper['title'],
@@ -53,9 +95,7 @@ class TestMedHashIntegration:
         mock_abstract.return_value = sample_paper['abstract']
         mock_put.return_value = {}
         
-        fetch_event = {
-            'body': json.dumps({'pmid': '12345678'})
-        }
+        fetch_event = _PMID_EVENTS['12345678']
         
         fetch_response = fetch_app.lambda_handler(fetch_event, None)
         assert fetch_response['statusCode'] == 200
@@ -63,114 +103,129 @@ class TestMedHashIntegration:
         assert fetch_body['pmid'] == '12345678'
         assert fetch_body['cached'] is False
         
-        # === STEP 2: Generate Summary ===
-        with patch('summary_app.papers_table.get_item') as mock_paper_get:
-            mock_paper_get.return_value = {'Item': sample_paper}
+        workflow_state['pmid'] = fetch_body['pmid']
+    
+    def test_02_summary(self, workflow_state, sample_paper):
+        """Workflow step 2: generate summaries for the fetched paper"""
+        pmid = _from_earlier_step(workflow_state, 'pmid')
+        
+        with patch.multiple('summary_app.BedrockSummarizer',
+                            generate_short_summary=DEFAULT,
+                            generate_medium_summary=DEFAULT,
+                            generate_long_summary=DEFAULT) as summarizer_mocks, \
+             patch('summary_app.papers_table.get_item', return_value={'Item': sample_paper}), \
+             patch('summary_app.summaries_table.get_item', return_value={}), \
+             patch('summary_app.summaries_table.update_item') as mock_update:
+            mock_update.return_value = {
+                'Attributes': {
+                    'pmid': pmid,
+                    'short': 'Short test summary',
+                    'medium': 'Medium test summary',
+                    'long': 'Long test summary',
+                    'created_at': '2024-01-01T00:00:00'
+                }
+            }
+            summarizer_mocks['generate_short_summary'].return_value = summary_app.Generation('Short test summary', summary_app.bedrock_model_id)
+            summarizer_mocks['generate_medium_summary'].return_value = summary_app.Generation('Medium test summary', summary_app.bedrock_model_id)
+            summarizer_mocks['generate_long_summary'].return_value = summary_app.Generation('Long test summary', summary_app.bedrock_model_id)
             
-            with patch('summary_app.BedrockSummarizer.generate_short_summary') as mock_short:
-                mock_short.return_value = 'Short test summary'
-                
-                with patch('summary_app.BedrockSummarizer.generate_medium_summary') as mock_medium:
-                    mock_medium.return_value = 'Medium test summary'
-                    
-                    with patch('summary_app.BedrockSummarizer.generate_long_summary') as mock_long:
-                        mock_long.return_value = 'Long test summary'
-                        
-                        with patch('summary_app.summaries_table.put_item') as mock_summary_put:
-                            mock_summary_put.return_value = {}
-                            
-                            summary_event = {
-                                'body': json.dumps({
-                                    'pmid': '12345678',
-                                    'type': 'all'
-                                })
-                            }
-                            
-                            summary_response = summary_app.lambda_handler(summary_event, None)
-                            assert summary_response['statusCode'] == 200
-                            summary_body = json.loads(summary_response['body'])
-                            assert 'summaryId' in summary_body
-                            assert 'short' in summary_body['summaries']
-                            
-                            summary_id = summary_body['summaryId']
-        
-        # === STEP 3: Create Hash ===
-        with patch('hash_app.verifications_table.put_item') as mock_hash_put:
-            mock_hash_put.return_value = {}
+            summary_event = {
+                'body': json.dumps({
+                    'pmid': pmid,
+                    'type': 'all'
+                })
+            }
             
+            summary_response = summary_app.lambda_handler(summary_event, None)
+        
+        assert summary_response['statusCode'] == 200
+        summary_body = json.loads(summary_response['body'])
+        assert summary_body['summaryId'] is not None
+        assert 'short' in summary_body['summaries']
+        
+        workflow_state['summary_id'] = summary_body['summaryId']
+        workflow_state['summary'] = summary_body['summaries']['medium']
+    
+    def test_03_hash(self, workflow_state, sample_paper):
+        """Workflow step 3: hash the generated summary"""
+        pmid = _from_earlier_step(workflow_state, 'pmid')
+        summary_id = _from_earlier_step(workflow_state, 'summary_id')
+        summary = _from_earlier_step(workflow_state, 'summary')
+        
+        with patch('hash_app.verifications_table.put_item', return_value={}):
             hash_event = {
                 'body': json.dumps({
-                    'pmid': '12345678',
+                    'pmid': pmid,
                     'summaryId': summary_id,
                     'title': sample_paper['title'],
-                    'summary': 'Medium test summary',
+                    'summary': summary,
                     'storeOnChain': True
                 })
             }
             
             hash_response = hash_app.lambda_handler(hash_event, None)
-            assert hash_response['statusCode'] == 200
-            hash_body = json.loads(hash_response['body'])
-            assert 'hash' in hash_body
-            assert 'verification_url' in hash_body
-            
-            hash_value = hash_body['hash']
         
-        # === STEP 4: Verify Hash ===
-        with patch('verify_app.verifications_table.get_item') as mock_verify_get:
-            mock_verify_get.return_value = {
-                'Item': {
+        assert hash_response['statusCode'] == 200
+        hash_body = json.loads(hash_response['body'])
+        assert 'hash' in hash_body
+        assert 'verification_url' in hash_body
+        
+        workflow_state['hash'] = hash_body['hash']
+    
+    def test_04_verify(self, workflow_state, sample_paper):
+        """Workflow step 4: verify the hash"""
+        pmid = _from_earlier_step(workflow_state, 'pmid')
+        summary_id = _from_earlier_step(workflow_state, 'summary_id')
+        hash_value = _from_earlier_step(workflow_state, 'hash')
+        
+        # verify-hash increments and reads the record in one update_item call
+        with patch('verify_app.verifications_table.update_item') as mock_verify_update:
+            mock_verify_update.return_value = {
+                'Attributes': {
                     'hash': hash_value,
-                    'pmid': '12345678',
+                    'pmid': pmid,
                     'summaryId': summary_id,
                     'paper_title': sample_paper['title'],
                     'created_at': datetime.utcnow().isoformat(),
-                    'verification_count': 0
+                    'verification_count': 1
                 }
             }
             
-            with patch('verify_app.verifications_table.update_item') as mock_verify_update:
-                mock_verify_update.return_value = {}
-                
-                verify_event = {
-                    'pathParameters': {
-                        'hash': hash_value
-                    }
+            verify_event = {
+                'pathParameters': {
+                    'hash': hash_value
                 }
-                
-                verify_response = verify_app.lambda_handler(verify_event, None)
-                assert verify_response['statusCode'] == 200
-                verify_body = json.loads(verify_response['body'])
-                assert verify_body['verified'] is True
-                assert verify_body['hash'] == hash_value
-                assert verify_body['pmid'] == '12345678'
+            }
+            
+            verify_response = verify_app.lambda_handler(verify_event, None)
+        
+        assert verify_response['statusCode'] == 200
+        verify_body = json.loads(verify_response['body'])
+        assert verify_body['verified'] is True
+        assert verify_body['hash'] == hash_value
+        assert verify_body['pmid'] == pmid
     
     def test_error_handling_workflow(self):
         """Test error handling across the workflow"""
         
         # Test fetch with invalid PMID
-        fetch_event = {
-            'body': json.dumps({'pmid': 'invalid'})
-        }
+        fetch_event = _PMID_EVENTS['invalid']
         
         fetch_response = fetch_app.lambda_handler(fetch_event, None)
         assert fetch_response['statusCode'] == 400
         
         # Test generate summary without paper
-        summary_event = {
-            'body': json.dumps({'pmid': '99999999'})
-        }
+        summary_event = _PMID_EVENTS['99999999']
         
-        with patch('summary_app.papers_table.get_item') as mock_get:
+        with patch('summary_app.papers_table.get_item') as mock_get, \
+             patch('summary_app.summaries_table.get_item', return_value={}):
             mock_get.return_value = {}  # Paper not found
             
             summary_response = summary_app.lambda_handler(summary_event, None)
             assert summary_response['statusCode'] == 404
         
         # Test create hash with missing fields
-        hash_event = {
-            'body': json.dumps({'pmid': '12345678'})  # Missing summaryId and summary
-        }
+        hash_event = _PMID_EVENTS['12345678']  # Missing summaryId and summary
         
         hash_response = hash_app.lambda_handler(hash_event, None)
         assert hash_response['statusCode'] == 400
@@ -182,8 +237,12 @@ class TestMedHashIntegration:
             }
         }
         
-        with patch('verify_app.verifications_table.get_item') as mock_get:
-            mock_get.return_value = {}  # Hash not found
+        exceptions = verify_app.verifications_table.meta.client.exceptions
+        with patch('verify_app.verifications_table.update_item') as mock_update:
+            # attribute_exists condition fails for an unknown hash
+            mock_update.side_effect = exceptions.ConditionalCheckFailedException(
+                {'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem'
+            )
             
             verify_response = verify_app.lambda_handler(verify_event, None)
             assert verify_response['statusCode'] == 404
@@ -198,9 +257,7 @@ class TestMedHashIntegration:
         # Simulate PubMed API error
         mock_metadata.side_effect = Exception("PubMed API unavailable")
         
-        fetch_event = {
-            'body': json.dumps({'pmid': '12345678'})
-        }
+        fetch_event = _PMID_EVENTS['12345678']
         
         with patch('fetch_app.table.get_item') as mock_get:
             mock_get.return_value = {}  # No cached item
@@ -208,14 +265,49 @@ class TestMedHashIntegration:
             response = fetch_app.lambda_handler(fetch_event, None)
             assert response['statusCode'] == 500
     
-    @patch('summary_app.BedrockSummarizer.generate_medium_summary')
-    def test_bedrock_error_handling(self, mock_summary, sample_paper):
+    def test_bedrock_error_handling(self, bedrock_client, sample_paper):
         """Test handling of Bedrock API errors"""
+        client, stubber = bedrock_client
+        
+        # Simulate a non-retriable Bedrock error on the real client call
+        stubber.add_client_error(
+            'converse_stream',
+            service_error_code='ValidationException',
+            http_status_code=400
+        )
+        
+        with patch('summary_app.bedrock', client), \
+             patch('summary_app.papers_table.get_item') as mock_get, \
+             patch('summary_app.summaries_table.get_item', return_value={}), \
+             patch('summary_app.summaries_table.update_item') as mock_update:
+            mock_get.return_value = {'Item': sample_paper}
+            
+            summary_event = {
+                'body': json.dumps({
+                    'pmid': '12345678',
+                    'type': 'medium'
+                })
+            }
+            
+            response = summary_app.lambda_handler(summary_event, None)
+            # The summarizer absorbs the error and returns its failure text
+            assert response['statusCode'] == 200
+            body = json.loads(response['body'])
+            assert body['summaries']['medium'].startswith(summary_app.FAILED_SUMMARY_PREFIX)
+            # Failure text is never stored, so the next request tries again
+            mock_update.assert_not_called()
+            assert body['summaryId'] is None
+        
+        stubber.assert_no_pending_responses()
+    
+    @patch('summary_app.BedrockSummarizer.generate_medium_summary')
+    def test_summary_generation_failure(self, mock_summary, sample_paper):
+        """Test that an error escaping the summarizer fails the request"""
         
-        # Simulate Bedrock error
         mock_summary.side_effect = Exception("Bedrock API error")
         
-        with patch('summary_app.papers_table.get_item') as mock_get:
+        with patch('summary_app.papers_table.get_item') as mock_get, \
+             patch('summary_app.summaries_table.get_item', return_value={}):
             mock_get.return_value = {'Item': sample_paper}
             
             summary_event = {
@@ -232,9 +324,7 @@ class TestMedHashIntegration:
         """Test handling of DynamoDB errors"""
         
         # Test fetch with DynamoDB error
-        fetch_event = {
-            'body': json.dumps({'pmid': '12345678'})
-        }
+        fetch_event = _PMID_EVENTS['12345678']
         
         with patch('fetch_app.table.get_item') as mock_get:
             mock_get.side_effect = Exception("DynamoDB unavailable")
@@ -249,31 +339,23 @@ class TestMedHashIntegration:
                     # Should return 200 even if DynamoDB fails
                     assert response['statusCode'] == 200
     
+    @pytest.mark.skipif(os.environ.get('COVERAGE_RUN'),
+                        reason="fetch-pubmed's worker threads skew coverage")
     def test_concurrent_requests(self):
-        """Test handling of concurrent requests (simulated)"""
+        """Test handling of back-to-back requests in one container"""
         
-        # Simulate multiple simultaneous requests
-        import concurrent.futures
+        # Handlers are called sequentially: patching is not thread-safe, and the
+        # mocked handlers gain nothing from a thread pool
+        events = [_PMID_EVENTS[pmid] for pmid in ('11111111', '22222222', '33333333', '44444444')]
         
-        def make_request(pmid):
-            event = {
-                'body': json.dumps({'pmid': pmid})
-            }
+        with patch('fetch_app.table.get_item') as mock_get, \
+             patch('fetch_app.PubMedFetcher.fetch_metadata') as mock_metadata, \
+             patch('fetch_app.PubMedFetcher.fetch_abstract') as mock_abstract:
+            mock_get.return_value = {}
+            mock_metadata.side_effect = lambda pmid: {'title': f'Paper {pmid}'}
+            mock_abstract.side_effect = lambda pmid: f'Abstract {pmid}'
             
-            with patch('fetch_app.table.get_item') as mock_get:
-                mock_get.return_value = {}
-                with patch('fetch_app.PubMedFetcher.fetch_metadata') as mock_metadata:
-                    mock_metadata.return_value = {'title': f'Paper {pmid}'}
-                    with patch('fetch_app.PubMedFetcher.fetch_abstract') as mock_abstract:
-                        mock_abstract.return_value = f'Abstract {pmid}'
-                        
-                        return fetch_app.lambda_handler(event, None)
-        
-        pmids = ['11111111', '22222222', '33333333', '44444444']
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(make_request, pmid) for pmid in pmids]
-            responses = [f.result() for f in futures]
+            responses = [fetch_app.lambda_handler(event, None) for event in events]
         
         # All requests should succeed
         assert all(r['statusCode'] == 200 for r in responses)
\ No newline at end of file
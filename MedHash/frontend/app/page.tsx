@@ -56,7 +56,7 @@ export default function Home() {
 
       const summaryData = await apiClient.generateSummary(pmid, 'all');
       setSummaries(summaryData.summaries);
-      setSummaryId(summaryData.summaryId);
+      setSummaryId(summaryData.summaryId ?? '');
 
     } catch (error: any) {
       console.error('Error:', error);
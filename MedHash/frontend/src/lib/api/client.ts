@@ -12,7 +12,7 @@ export interface Paper {
 }
 
 export interface SummaryResponse {
-  summaryId: string;
+  summaryId: string | null;
   pmid: string;
   summaries: {
     short: string;